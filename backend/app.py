@@ -8,6 +8,8 @@ from flask_cors import CORS
 from flask_pymongo import PyMongo
 import mongoengine
 import logging
+import threading
+import time
 from config import config
 
 # Initialize extensions
@@ -25,24 +27,9 @@ def create_app(config_name='default'):
     app.config.from_object(config[config_name])
     
     # Initialize MongoDB with error handling
-    try:
-        # Disconnect any existing connections first
-        mongoengine.disconnect()
-        
-        # Connect with a specific alias to avoid conflicts
-        mongoengine.connect(
-            host=app.config['MONGODB_URI'],
-            db=app.config.get('MONGODB_DB', 'retailer_recommendations'),
-            alias='default',
-            serverSelectionTimeoutMS=5000  # 5 second timeout
-        )
-        app.logger.info("MongoDB connected successfully")
-    except Exception as e:
-        app.logger.warning(f"MongoDB connection failed: {e}")
-        app.logger.warning("Application will start but database features may not work")
+    connect_databases(app)
     
     # Initialize extensions
-    mongo.init_app(app)
     login_manager.init_app(app)
     CORS(app)
     
@@ -113,8 +100,105 @@ def create_app(config_name='default'):
         except Exception as e:
             app.logger.error(f"Database initialization error: {e}")
     
+    # Load persisted model artifacts so workers serve without retraining
+    load_model_artifacts(app)
+    
     return app
 
+def connect_databases(app):
+    """(Re)open MongoDB clients; called again in each forked worker"""
+    try:
+        # Disconnect any existing connections first
+        mongoengine.disconnect()
+        
+        # Connect with a specific alias to avoid conflicts
+        mongoengine.connect(
+            host=app.config['MONGODB_URI'],
+            db=app.config.get('MONGODB_DB', 'retailer_recommendations'),
+            alias='default',
+            serverSelectionTimeoutMS=5000  # 5 second timeout
+        )
+        app.logger.info("MongoDB connected successfully")
+    except Exception as e:
+        app.logger.warning(f"MongoDB connection failed: {e}")
+        app.logger.warning("Application will start but database features may not work")
+    
+    mongo.init_app(app)
+
+def load_model_artifacts(app):
+    """Memory-map the latest trained models, if any have been persisted"""
+    try:
+        from backend.models.recommendation import recommendation_engine
+        from backend.services.ai_recommendation_service import ai_recommendation_service
+        
+        if recommendation_engine.load_latest_snapshot():
+            app.logger.info(f"Recommendation engine snapshot {recommendation_engine.snapshot.version} loaded")
+        if ai_recommendation_service.load_models():
+            app.logger.info("AI recommendation models loaded")
+    except Exception as e:
+        app.logger.warning(f"Could not load model artifacts: {e}")
+
+def preload_models(app):
+    """Load models, or train them if none are persisted, before workers are forked"""
+    try:
+        from backend.models.recommendation import recommendation_engine
+        from backend.services.ai_recommendation_service import ai_recommendation_service
+        from backend.utils.leaderboard import popularity_leaderboard
+        
+        if recommendation_engine.snapshot is None:
+            app.logger.info("No persisted recommendation snapshot, training before fork")
+            recommendation_engine.train_models()
+        ai_recommendation_service.ensure_models()
+        
+        # Workers inherit built leaderboards instead of building them on their first request
+        popularity_leaderboard.ensure_fresh(wait=True)
+    except Exception as e:
+        app.logger.warning(f"Could not preload models: {e}")
+
+def start_model_reloader(app, interval=None):
+    """Poll the model store and swap in models trained by other processes"""
+    from backend.models.recommendation import recommendation_engine
+    from backend.services.ai_recommendation_service import ai_recommendation_service
+    from backend.utils.leaderboard import popularity_leaderboard
+    from backend.utils.purchase_index import purchase_index
+    from backend.utils.trending import trending_products
+    
+    interval = interval or app.config.get('MODEL_RELOAD_INTERVAL', 30)
+    
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                if recommendation_engine.reload_if_stale():
+                    app.logger.info(f"Reloaded recommendation snapshot {recommendation_engine.snapshot.version}")
+                if ai_recommendation_service.reload_if_stale():
+                    app.logger.info(f"Reloaded AI models {ai_recommendation_service.models_version}")
+                
+                # Replay purchases other workers folded in since the snapshot and
+                # drop results other workers invalidated
+                recommendation_engine.sync_fold_ins()
+                recommendation_engine.sync_invalidations()
+                
+                # Retrain thresholds apply to changes made through any worker
+                recommendation_engine.refresh_change_counters()
+                
+                # Pick up leaderboards another process published; whichever process
+                # claims the store lock rebuilds them once they are stale
+                popularity_leaderboard.reload()
+                popularity_leaderboard.ensure_fresh(wait=True)
+                
+                # Keep built indexes refreshed off the request path
+                if purchase_index.built_at is not None:
+                    purchase_index.ensure_fresh(wait=True)
+                if trending_products.seeded_at is not None:
+                    trending_products.ensure_fresh(wait=True)
+            except Exception as e:
+                app.logger.error(f"Model reload failed: {e}")
+    
+    thread = threading.Thread(target=run, name='model-reloader', daemon=True)
+    thread.start()
+    return thread
+
 @login_manager.user_loader
 def load_user(user_id):
     """Load user for Flask-Login"""
@@ -25,10 +25,11 @@ class Retailer(Document, UserMixin):
     last_login = fields.DateTimeField()
     is_active = fields.BooleanField(default=True)
     profile_data = fields.DictField()
+    recommendations_invalidated_at = fields.DateTimeField()
     
     meta = {
         'collection': 'retailers',
-        'indexes': ['email', 'location', 'store_type']
+        'indexes': ['email', 'location', 'store_type', 'recommendations_invalidated_at']
     }
     
     def get_id(self):
@@ -105,7 +106,7 @@ class Product(Document):
     
     meta = {
         'collection': 'products',
-        'indexes': ['category', 'brand', 'price', 'sku', 'popularity_score']
+        'indexes': ['category', 'brand', 'price', 'sku', 'popularity_score', 'updated_date']
     }
     
     def save(self, *args, **kwargs):
@@ -199,7 +200,8 @@ class Feedback(Document):
         'collection': 'feedback',
         'indexes': [
             ('retailer_id', 'feedback_date'),
-            'feedback_type'
+            'feedback_type',
+            'feedback_date'
         ]
     }
     
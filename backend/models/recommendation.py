@@ -9,26 +9,246 @@ from sklearn.decomposition import TruncatedSVD
 from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
 import logging
+import multiprocessing
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
 from typing import List, Dict, Tuple, Optional
-from backend.models.mongodb_models import Retailer, Product, Purchase, Feedback
+from backend.models.mongodb_models import (
+    Retailer, Product, Purchase, Feedback, Recommendation, RetailerPreference
+)
+from backend.utils.data_processor import PurchaseMatrix
+from backend.utils.training_data import PurchaseColumns, TrainingDataLoader
+from backend.utils.similarity import IVFIndex, NeighborIndex, top_k_indices
+from backend.utils.model_store import ModelStore
+from backend.utils.cache import LRUCache
+from backend.utils.write_behind import WriteBehindQueue
+from backend.utils.implicit_als import ImplicitALS
+from backend.utils.trending import trending_products
+from backend.utils.leaderboard import popularity_leaderboard
+from backend.utils.product_summary import PRODUCT_SUMMARY_FIELDS, product_summary
+from pymongo import InsertOne, UpdateOne
+from scipy import sparse
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+class ModelSnapshot:
+    """Trained model state published as a unit by RecommendationEngine"""
+    
+    def __init__(self):
+        self.version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+        self.trained_at = None
+        
+        # Collaborative filtering state
+        self.collaborative_algorithm = 'svd'
+        self.collaborative_model = None
+        self.purchase_matrix = None
+        self.retailer_factors = None
+        self.item_factors = None
+        self.item_index = None
+        
+        # Retailers updated by fold-in since training: retailer_id -> (factors, ratings by column)
+        self.folded_retailers = {}
+        self.folded_interactions = 0
+        
+        # Purchases already folded in, and the newest purchase date replayed from MongoDB
+        self.folded_purchase_ids = set()
+        self.fold_in_synced_to = None
+        
+        # Partitioned mode: one collaborative sub-snapshot per category or store type
+        self.partition_by = None
+        self.partitions = {}
+        self.retailer_partitions = {}
+        
+        # Content-based state
+        self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        self.content_index = None
+        self.product_indices = {}
+        self.content_product_ids = None
+    
+    def to_artifacts(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """Split the snapshot into arrays and JSON metadata for ModelStore"""
+        arrays = {}
+        metadata = {'trained_at': self.trained_at.isoformat() if self.trained_at else None}
+        
+        if self.item_factors is not None:
+            matrix = self.purchase_matrix.matrix
+            arrays.update({
+                'interactions_data': matrix.data,
+                'interactions_indices': matrix.indices,
+                'interactions_indptr': matrix.indptr,
+                'retailer_factors': self.retailer_factors,
+                'item_factors': self.item_factors
+            })
+            metadata.update({
+                'collaborative_algorithm': self.collaborative_algorithm,
+                'interactions_shape': list(matrix.shape),
+                'retailer_ids': [str(i) for i in self.purchase_matrix.retailer_ids],
+                'product_ids': [str(i) for i in self.purchase_matrix.product_ids]
+            })
+            if self.item_index is not None:
+                arrays.update({
+                    'ivf_centroids': self.item_index.centroids,
+                    'ivf_offsets': self.item_index.list_offsets,
+                    'ivf_items': self.item_index.list_items
+                })
+            if isinstance(self.collaborative_model, ImplicitALS):
+                metadata['als_params'] = {
+                    'factors': self.collaborative_model.factors,
+                    'regularization': self.collaborative_model.regularization,
+                    'alpha': self.collaborative_model.alpha
+                }
+        
+        if self.content_index is not None:
+            arrays.update({
+                'neighbors': self.content_index.neighbors,
+                'neighbor_scores': self.content_index.scores,
+                'idf': self.tfidf_vectorizer.idf_
+            })
+            if self.content_index.weights is not None:
+                arrays['neighbor_weights'] = self.content_index.weights
+            metadata.update({
+                'content_product_ids': [str(i) for i in self.content_product_ids],
+                'vocabulary': {term: int(i) for term, i in self.tfidf_vectorizer.vocabulary_.items()}
+            })
+        
+        if self.partitions:
+            metadata['partition_by'] = self.partition_by
+            metadata['partitions'] = []
+            for i, (key, partition) in enumerate(sorted(self.partitions.items())):
+                partition_arrays, partition_metadata = partition.to_artifacts()
+                arrays.update({f"p{i}__{name}": array for name, array in partition_arrays.items()})
+                metadata['partitions'].append({'key': key, 'metadata': partition_metadata})
+        
+        return arrays, metadata
+    
+    @classmethod
+    def from_artifacts(cls, arrays: Dict[str, np.ndarray], metadata: Dict) -> 'ModelSnapshot':
+        """Rebuild a snapshot from (possibly memory-mapped) ModelStore artifacts"""
+        snapshot = cls()
+        snapshot.version = metadata['version']
+        if metadata.get('trained_at'):
+            snapshot.trained_at = datetime.fromisoformat(metadata['trained_at'])
+        
+        if 'item_factors' in arrays:
+            matrix = sparse.csr_matrix(
+                (arrays['interactions_data'], arrays['interactions_indices'], arrays['interactions_indptr']),
+                shape=tuple(metadata['interactions_shape'])
+            )
+            snapshot.purchase_matrix = PurchaseMatrix(
+                matrix,
+                np.array(metadata['retailer_ids'], dtype=object),
+                np.array(metadata['product_ids'], dtype=object)
+            )
+            snapshot.retailer_factors = arrays['retailer_factors']
+            snapshot.item_factors = arrays['item_factors']
+            snapshot.collaborative_algorithm = metadata.get('collaborative_algorithm', 'svd')
+            if 'ivf_centroids' in arrays:
+                snapshot.item_index = IVFIndex(
+                    snapshot.item_factors, arrays['ivf_centroids'], arrays['ivf_offsets'],
+                    arrays['ivf_items'], Config.ANN_PROBES
+                )
+            
+            # ALS fold-in needs the solver parameters alongside the item factors
+            if 'als_params' in metadata:
+                snapshot.collaborative_model = ImplicitALS(**metadata['als_params'])
+                snapshot.collaborative_model.item_factors = snapshot.item_factors
+        
+        if 'neighbors' in arrays:
+            snapshot.content_index = NeighborIndex(
+                arrays['neighbors'], arrays['neighbor_scores'], arrays.get('neighbor_weights')
+            )
+            snapshot.content_product_ids = np.array(metadata['content_product_ids'], dtype=object)
+            snapshot.product_indices = {
+                product_id: i for i, product_id in enumerate(metadata['content_product_ids'])
+            }
+            snapshot.tfidf_vectorizer.vocabulary_ = metadata['vocabulary']
+            snapshot.tfidf_vectorizer.idf_ = np.asarray(arrays['idf'])
+        
+        if metadata.get('partitions'):
+            snapshot.partition_by = metadata['partition_by']
+            for i, entry in enumerate(metadata['partitions']):
+                prefix = f"p{i}__"
+                partition_arrays = {
+                    name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)
+                }
+                partition_metadata = dict(entry['metadata'], version=metadata['version'])
+                snapshot.partitions[entry['key']] = cls.from_artifacts(partition_arrays, partition_metadata)
+            snapshot.index_partitions()
+        
+        return snapshot
+    
+    def index_partitions(self):
+        """Map each retailer to the partitions it has interactions in"""
+        self.retailer_partitions = {}
+        for key, partition in self.partitions.items():
+            for retailer_id in partition.purchase_matrix.retailer_ids:
+                self.retailer_partitions.setdefault(retailer_id, []).append(key)
+
 class RecommendationEngine:
     """Main recommendation engine class"""
     
+    ARTIFACT_NAME = 'recommendation_engine'
+    
+    # Purchases and invalidations are re-read this far behind the last sync,
+    # so writes committed slightly out of date order are not skipped
+    SYNC_OVERLAP = timedelta(minutes=1)
+    
+    # Ranker weight of each candidate source (scores are max-normalised per request)
+    RANKING_WEIGHTS = {'collaborative': 0.6, 'content': 0.4, 'trending': 0.1, 'popular': 0.05}
+    
+    # Product fields returned with each recommendation
     def __init__(self):
-        self.collaborative_model = None
         self.content_model = None
         self.scaler = StandardScaler()
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
         self.last_training_time = None
         self.min_interactions = 5
+        self.collaborative_algorithm = Config.COLLABORATIVE_ALGORITHM
+        
+        # Requests read the current snapshot; training swaps in a new one
+        self.snapshot = None
+        self._training_lock = threading.Lock()
+        self._fold_in_lock = threading.Lock()
+        
+        # Data changes since the current snapshot; crossing a threshold triggers a retrain
+        self.change_counters = {'purchases': 0, 'feedback': 0, 'catalog': 0}
+        self._counter_lock = threading.Lock()
+        
+        # Trained snapshots are persisted so other workers can memory-map them
+        self.model_store = ModelStore(Config.MODEL_ARTIFACT_DIR, Config.MODEL_ARTIFACT_VERSIONS)
+        
+        # Final recommendations keyed by (retailer_id, count, snapshot version)
+        self.result_cache = LRUCache(Config.RECOMMENDATION_CACHE_SIZE, Config.RECOMMENDATION_CACHE_TTL)
+        self._invalidations_synced_to = None
+        
+        # Training data is streamed from projected cursors into columns
+        self.training_data = TrainingDataLoader(Config.TRAINING_LOAD_BATCH_SIZE)
+        
+        # Candidate sources and ranking inputs run here under per-stage deadlines
+        self._pipeline_executor = ThreadPoolExecutor(
+            max_workers=Config.PIPELINE_WORKERS, thread_name_prefix='recommendation-pipeline'
+        )
+        
+        # Recommendation and feedback writes are batched off the request path
+        self.write_queue = WriteBehindQueue(
+            max_pending=Config.WRITE_BEHIND_MAX_PENDING,
+            batch_size=Config.WRITE_BEHIND_BATCH_SIZE,
+            flush_interval=Config.WRITE_BEHIND_FLUSH_INTERVAL,
+            enqueue_timeout=Config.WRITE_BEHIND_ENQUEUE_TIMEOUT
+        )
         
     def get_recommendations(self, retailer_id: str, num_recommendations: int = 10) -> List[Dict]:
         """
         Get product recommendations for a retailer
         
+        Runs as a two-stage pipeline under RECOMMENDATION_DEADLINE: candidate
+        sources (collaborative, content, trending, popular) run concurrently,
+        then one vectorised ranker scores their union. A source that misses
+        its stage deadline is dropped for this request instead of blocking it.
+        
         Args:
             retailer_id: UUID of the retailer
             num_recommendations: Number of recommendations to return
@@ -37,411 +257,1244 @@ class RecommendationEngine:
             List of recommended products with scores
         """
         try:
-            # Get retailer
-            retailer = Retailer.query.get(retailer_id)
-            if not retailer:
-                logger.error(f"Retailer {retailer_id} not found")
-                return []
-            
-            # Check if models need training
+            # Refresh models off the request path; keep serving the current snapshot
             if self._should_retrain_models():
-                self.train_models()
+                self.start_background_training()
             
-            # Get collaborative filtering recommendations
-            collaborative_recs = self._get_collaborative_recommendations(retailer_id, num_recommendations * 2)
+            snapshot = self.snapshot
             
-            # Get content-based recommendations
-            content_recs = self._get_content_based_recommendations(retailer_id, num_recommendations * 2)
+            # Serve unchanged inputs from the result cache
+            if snapshot is not None:
+                cache_key = (retailer_id, num_recommendations, snapshot.version)
+                cached_recs = self.result_cache.get(cache_key)
+                if cached_recs is not None:
+                    return [dict(rec) for rec in cached_recs]
             
-            # Combine recommendations using hybrid approach
-            hybrid_recs = self._combine_recommendations(
-                collaborative_recs, content_recs, retailer_id, num_recommendations
-            )
+            deadline = time.monotonic() + Config.RECOMMENDATION_DEADLINE
             
-            # Filter out already purchased products
-            filtered_recs = self._filter_purchased_products(retailer_id, hybrid_recs)
+            # Get retailer
+            retailer = Retailer.objects(retailer_id=retailer_id).first()
+            if not retailer:
+                logger.error(f"Retailer {retailer_id} not found")
+                return []
             
-            # Apply business rules
-            final_recs = self._apply_business_rules(retailer_id, filtered_recs[:num_recommendations])
+            if snapshot is None:
+                return self._get_fallback_recommendations(retailer_id, num_recommendations)
+            
+            # Stage 1: candidate generation
+            per_source = max(Config.CANDIDATES_PER_SOURCE, num_recommendations * 2)
+            candidates = self._run_stage('candidates', {
+                'collaborative': lambda: self._get_collaborative_recommendations(snapshot, retailer_id, per_source),
+                'content': lambda: self._get_content_based_recommendations(snapshot, retailer_id, per_source),
+                'trending': lambda: self._get_trending_candidates(per_source),
+                'popular': lambda: self._get_popular_candidates(per_source)
+            }, min(deadline, time.monotonic() + Config.CANDIDATE_STAGE_TIMEOUT))
+            
+            # Stage 2: ranking inputs, then one vectorised ranking pass
+            candidate_ids = {product_id for recs in candidates.values() for product_id, _ in recs}
+            inputs = self._run_stage('ranking', {
+                'products': lambda: self._fetch_products(candidate_ids),
+                'purchased': lambda: self._load_recent_purchases([retailer_id]).get(retailer_id, set()),
+                'preferences': lambda: self._load_preferences([retailer_id]).get(retailer_id, [])
+            }, deadline)
+            
+            if 'products' not in inputs:
+                return self._get_fallback_recommendations(retailer_id, num_recommendations)
+            
+            final_recs = self._rank_candidates(
+                candidates, inputs['products'], inputs.get('purchased', set()),
+                inputs.get('preferences', []), num_recommendations
+            )
             
             # Store recommendations in database
             self._store_recommendations(retailer_id, final_recs)
             
+            # Results missing a source are served once but not cached
+            if len(candidates) == len(self.RANKING_WEIGHTS) and len(inputs) == 3:
+                self.result_cache.set(cache_key, [dict(rec) for rec in final_recs], group=retailer_id)
             return final_recs
             
         except Exception as e:
             logger.error(f"Error generating recommendations for retailer {retailer_id}: {e}")
             return self._get_fallback_recommendations(retailer_id, num_recommendations)
     
-    def train_models(self):
-        """Train both collaborative and content-based models"""
+    def get_recommendations_batch(self, retailer_ids: List[str], num_recommendations: int = 10) -> Dict[str, List[Dict]]:
+        """
+        Get product recommendations for many retailers at once
+        
+        Retailers are scored in chunks with one matrix product per model,
+        candidates are hydrated with a single product query and all results
+        are persisted with one bulk insert.
+        
+        Args:
+            retailer_ids: UUIDs of the retailers
+            num_recommendations: Number of recommendations per retailer
+            
+        Returns:
+            Dictionary mapping retailer ID to its list of recommendations
+        """
+        retailer_ids = list(dict.fromkeys(str(retailer_id) for retailer_id in retailer_ids))
+        
+        try:
+            # Refresh models off the request path; keep serving the current snapshot
+            if self._should_retrain_models():
+                self.start_background_training()
+            
+            snapshot = self.snapshot
+            if snapshot is None:
+                return {
+                    retailer_id: self._get_fallback_recommendations(retailer_id, num_recommendations)
+                    for retailer_id in retailer_ids
+                }
+            
+            # Serve cached retailers and only score the rest
+            results = {}
+            for retailer_id in retailer_ids:
+                cached_recs = self.result_cache.get((retailer_id, num_recommendations, snapshot.version))
+                if cached_recs is not None:
+                    results[retailer_id] = [dict(rec) for rec in cached_recs]
+            
+            pending_ids = [retailer_id for retailer_id in retailer_ids if retailer_id not in results]
+            if not pending_ids:
+                return results
+            
+            # Unknown retailers get an empty list, as in get_recommendations
+            known_retailers = set(Retailer.objects(retailer_id__in=pending_ids).scalar('retailer_id'))
+            active_ids = [retailer_id for retailer_id in pending_ids if retailer_id in known_retailers]
+            for retailer_id in pending_ids:
+                results[retailer_id] = []
+            
+            # Score retailers chunk by chunk to bound the dense score matrices
+            candidates = {}
+            chunk_size = Config.BATCH_SCORING_CHUNK_SIZE
+            for start in range(0, len(active_ids), chunk_size):
+                chunk_ids = active_ids[start:start + chunk_size]
+                collaborative_recs = self._get_collaborative_recommendations_batch(
+                    snapshot, chunk_ids, max(Config.CANDIDATES_PER_SOURCE, num_recommendations * 2)
+                )
+                content_recs = self._get_content_based_recommendations_batch(
+                    snapshot, chunk_ids, max(Config.CANDIDATES_PER_SOURCE, num_recommendations * 2)
+                )
+                for retailer_id in chunk_ids:
+                    candidates[retailer_id] = (
+                        collaborative_recs.get(retailer_id, []),
+                        content_recs.get(retailer_id, [])
+                    )
+            
+            # Retailer-independent sources are shared by the whole batch
+            per_source = max(Config.CANDIDATES_PER_SOURCE, num_recommendations * 2)
+            global_candidates = {
+                'trending': self._get_trending_candidates(per_source),
+                'popular': self._get_popular_candidates(per_source)
+            }
+            
+            # Hydrate every candidate product with one query
+            candidate_ids = {
+                product_id
+                for recs in list(global_candidates.values()) + [
+                    rec for pair in candidates.values() for rec in pair
+                ]
+                for product_id, _ in recs
+            }
+            products = self._fetch_products(candidate_ids)
+            
+            # Load filtering and business rule inputs in bulk
+            recent_purchases = self._load_recent_purchases(active_ids)
+            preferences = self._load_preferences(active_ids)
+            
+            for retailer_id in active_ids:
+                collaborative_recs, content_recs = candidates[retailer_id]
+                results[retailer_id] = self._rank_candidates(
+                    dict(global_candidates, collaborative=collaborative_recs, content=content_recs),
+                    products, recent_purchases.get(retailer_id, set()),
+                    preferences.get(retailer_id, []), num_recommendations
+                )
+            
+            # Store all recommendations with one bulk write
+            scored_results = {retailer_id: results[retailer_id] for retailer_id in active_ids}
+            self._store_recommendations_batch(scored_results)
+            
+            for retailer_id, recs in scored_results.items():
+                self.result_cache.set(
+                    (retailer_id, num_recommendations, snapshot.version),
+                    [dict(rec) for rec in recs],
+                    group=retailer_id
+                )
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error generating batch recommendations: {e}")
+            return {
+                retailer_id: self._get_fallback_recommendations(retailer_id, num_recommendations)
+                for retailer_id in retailer_ids
+            }
+    
+    def train_models(self) -> bool:
+        """
+        Train both collaborative and content-based models and publish them
+        
+        Blocks until any in-flight training run in this process has finished.
+        If another process sharing the model store is training, returns
+        without training; its snapshot is picked up by reload_if_stale.
+        
+        Returns:
+            True if a new snapshot was published
+        """
+        with self._training_lock:
+            store_lock = self._acquire_store_lock()
+            if store_lock is None:
+                logger.info("Recommendation models are being trained by another process")
+                return False
+            
+            try:
+                return self._train_and_publish()
+            finally:
+                self.model_store.release_training_lock(store_lock)
+    
+    def start_background_training(self) -> bool:
+        """
+        Start a training run in a background thread
+        
+        Returns:
+            False if a run is already in flight, True if a new one was started
+        """
+        if not self._training_lock.acquire(blocking=False):
+            return False
+        
+        store_lock = self._acquire_store_lock()
+        if store_lock is None:
+            self._training_lock.release()
+            return False
+        
+        def run():
+            try:
+                # Another process may have just finished a run; serve that instead
+                if self.reload_if_stale() and not self._should_retrain_models():
+                    return
+                self._train_and_publish()
+            finally:
+                self.model_store.release_training_lock(store_lock)
+                self._training_lock.release()
+        
+        try:
+            threading.Thread(target=run, name='recommendation-training', daemon=True).start()
+        except Exception as e:
+            self.model_store.release_training_lock(store_lock)
+            self._training_lock.release()
+            logger.error(f"Could not start background training: {e}")
+            return False
+        
+        return True
+    
+    def _acquire_store_lock(self):
+        """Claim the cross-process training lock; None if held elsewhere or unavailable"""
+        try:
+            return self.model_store.acquire_training_lock(self.ARTIFACT_NAME)
+        except Exception as e:
+            logger.error(f"Could not acquire training lock: {e}")
+            return None
+    
+    def _train_and_publish(self) -> bool:
+        """Build a new snapshot and swap it in; caller must hold the training lock"""
         try:
             logger.info("Starting model training...")
             
+            # Training sees purchases before this point; sync_fold_ins folds in the rest
+            data_cutoff = datetime.utcnow()
+            
             # Load data
-            purchase_data = self._load_purchase_data()
+            purchase_data = self._load_purchase_data(until=data_cutoff)
             product_data = self._load_product_data()
             
             if purchase_data.empty or product_data.empty:
                 logger.warning("Insufficient data for model training")
-                return
+                return False
+            
+            snapshot = ModelSnapshot()
+            snapshot.trained_at = data_cutoff
             
             # Train collaborative filtering model
-            self._train_collaborative_model(purchase_data)
+            if Config.COLLABORATIVE_PARTITION_BY:
+                self._train_partitioned_models(snapshot, purchase_data, product_data)
+            else:
+                self._train_collaborative_model(snapshot, purchase_data)
             
             # Train content-based model
-            self._train_content_model(product_data)
+            self._train_content_model(snapshot, product_data)
+            
+            # The snapshot keeps only derived state; drop the raw training data
+            del purchase_data, product_data
             
-            self.last_training_time = datetime.utcnow()
-            logger.info("Model training completed successfully")
+            self._publish_snapshot(snapshot)
+            self._save_snapshot(snapshot)
+            logger.info(f"Model training completed successfully (snapshot {snapshot.version})")
+            return True
             
         except Exception as e:
             logger.error(f"Error during model training: {e}")
+            return False
     
-    def _should_retrain_models(self) -> bool:
-        """Check if models should be retrained"""
-        if self.last_training_time is None:
+    def _publish_snapshot(self, snapshot: ModelSnapshot):
+        """Atomically replace the snapshot served to requests"""
+        if snapshot.trained_at is None:
+            snapshot.trained_at = datetime.utcnow()
+        self.snapshot = snapshot
+        self.last_training_time = snapshot.trained_at
+        
+        # Cached results belong to the previous version
+        self.result_cache.clear()
+        with self._counter_lock:
+            self.change_counters = dict.fromkeys(self.change_counters, 0)
+    
+    def _save_snapshot(self, snapshot: ModelSnapshot):
+        """Persist a snapshot as versioned artifacts"""
+        try:
+            arrays, metadata = snapshot.to_artifacts()
+            self.model_store.save(self.ARTIFACT_NAME, snapshot.version, arrays, metadata)
+        except Exception as e:
+            logger.error(f"Error saving model snapshot {snapshot.version}: {e}")
+    
+    def load_latest_snapshot(self) -> bool:
+        """
+        Load the most recently persisted snapshot with memory-mapped arrays
+        
+        Returns:
+            True if a snapshot was loaded and published
+        """
+        try:
+            loaded = self.model_store.load(self.ARTIFACT_NAME)
+            if loaded is None:
+                return False
+            
+            arrays, metadata = loaded
+            snapshot = ModelSnapshot.from_artifacts(arrays, metadata)
+            self._publish_snapshot(snapshot)
+            logger.info(f"Loaded model snapshot {snapshot.version}")
             return True
+            
+        except Exception as e:
+            logger.error(f"Error loading model snapshot: {e}")
+            return False
+    
+    def reload_if_stale(self) -> bool:
+        """
+        Load the persisted snapshot if another process has published a newer one
         
-        # Retrain every 24 hours
-        time_since_training = datetime.utcnow() - self.last_training_time
-        return time_since_training > timedelta(hours=24)
+        Returns:
+            True if a different snapshot was loaded
+        """
+        current_version = self.model_store.current_version(self.ARTIFACT_NAME)
+        snapshot = self.snapshot
+        if current_version is None or (snapshot is not None and snapshot.version == current_version):
+            return False
+        return self.load_latest_snapshot()
+    
+    def record_purchase(self, purchase: Purchase):
+        """Update serving state for a newly recorded purchase"""
+        retailer_id = str(purchase.retailer_id)
+        self._count_change('purchases')
+        
+        snapshot = self.snapshot
+        if snapshot is not None:
+            self._fold_in_new_purchases(snapshot, [(
+                str(purchase.purchase_id), retailer_id, str(purchase.product_id),
+                purchase.quantity, float(purchase.total_amount)
+            )])
+        self.invalidate_retailer(retailer_id)
     
-    def _load_purchase_data(self) -> pd.DataFrame:
-        """Load purchase data for training"""
+    def sync_fold_ins(self) -> int:
+        """
+        Fold in purchases recorded by other workers since the current snapshot
+        
+        The purchases collection is the shared fold-in log: every worker
+        replays the purchases newer than its snapshot, so a retailer's folded
+        vector does not depend on which worker served the purchase.
+        
+        Returns:
+            Number of purchases folded in
+        """
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.trained_at is None:
+            return 0
+        
         try:
-            # Get purchases from last 6 months
-            six_months_ago = datetime.utcnow() - timedelta(days=180)
+            # Purchases before trained_at were trained on, so the overlap never reaches past it
+            since = snapshot.trained_at
+            if snapshot.fold_in_synced_to is not None:
+                since = max(since, snapshot.fold_in_synced_to - self.SYNC_OVERLAP)
+            cursor = Purchase._get_collection().find(
+                {'purchase_date': {'$gte': since}},
+                projection={'retailer_id': 1, 'product_id': 1, 'quantity': 1, 'total_amount': 1, 'purchase_date': 1},
+                batch_size=Config.TRAINING_LOAD_BATCH_SIZE
+            ).sort('purchase_date', 1)
+            
+            purchases = []
+            synced_to = snapshot.fold_in_synced_to
+            for doc in cursor:
+                purchases.append((
+                    str(doc['_id']), str(doc['retailer_id']), str(doc['product_id']),
+                    int(doc['quantity']), float(str(doc.get('total_amount') or 0))
+                ))
+                synced_to = doc['purchase_date']
+            
+            folded = self._fold_in_new_purchases(snapshot, purchases)
+            snapshot.fold_in_synced_to = synced_to
+            return folded
             
-            purchases = db.session.query(
-                Purchase.retailer_id,
-                Purchase.product_id,
-                Purchase.quantity,
-                Purchase.total_amount,
-                Purchase.purchase_date
-            ).filter(
-                Purchase.purchase_date >= six_months_ago
-            ).all()
+        except Exception as e:
+            logger.error(f"Error syncing fold-in purchases: {e}")
+            return 0
+    
+    def _fold_in_new_purchases(self, snapshot: ModelSnapshot,
+                               purchases: List[Tuple[str, str, str, int, float]]) -> int:
+        """
+        Fold purchases into a snapshot, skipping any it has already folded in
+        
+        Args:
+            snapshot: Snapshot to update
+            purchases: (purchase_id, retailer_id, product_id, quantity, total_amount) tuples
             
-            if not purchases:
-                return pd.DataFrame()
+        Returns:
+            Number of purchases that had not been folded in before
+        """
+        with self._fold_in_lock:
+            new_purchases = [purchase for purchase in purchases if purchase[0] not in snapshot.folded_purchase_ids]
+            snapshot.folded_purchase_ids.update(purchase[0] for purchase in new_purchases)
+        
+        by_retailer = defaultdict(list)
+        for _, retailer_id, product_id, quantity, total_amount in new_purchases:
+            by_retailer[retailer_id].append((product_id, quantity, total_amount))
+        
+        for retailer_id, retailer_purchases in by_retailer.items():
+            self.fold_in_purchases(retailer_id, retailer_purchases, snapshot)
+            self.result_cache.invalidate_group(retailer_id)
+        
+        return len(new_purchases)
+    
+    def record_catalog_change(self, count: int = 1):
+        """Count products created, updated or removed since the current snapshot"""
+        self._count_change('catalog', count)
+    
+    def _count_change(self, kind: str, count: int = 1):
+        with self._counter_lock:
+            self.change_counters[kind] += count
+    
+    def invalidate_retailer(self, retailer_id: str):
+        """
+        Drop cached recommendations after a retailer's purchases, feedback or preferences change
+        
+        The cache is per process: this worker drops its entries now, and the
+        retailer's invalidation time is stored in MongoDB so the other
+        workers drop theirs on their next sync_invalidations. The marker is
+        written synchronously: unlike tracking rows it must never be dropped.
+        """
+        retailer_id = str(retailer_id)
+        self.result_cache.invalidate_group(retailer_id)
+        try:
+            Retailer.objects(retailer_id=retailer_id).update_one(
+                set__recommendations_invalidated_at=datetime.utcnow()
+            )
+        except Exception as e:
+            logger.error(f"Error recording cache invalidation for retailer {retailer_id}: {e}")
+    
+    def sync_invalidations(self) -> int:
+        """
+        Drop cached recommendations of retailers invalidated by any worker since the last sync
+        
+        Returns:
+            Number of retailers invalidated
+        """
+        checked_at = datetime.utcnow()
+        since = (self._invalidations_synced_to or checked_at) - self.SYNC_OVERLAP
+        
+        try:
+            retailer_ids = Retailer.objects(recommendations_invalidated_at__gte=since).scalar('retailer_id')
+            invalidated = 0
+            for retailer_id in retailer_ids:
+                self.result_cache.invalidate_group(str(retailer_id))
+                invalidated += 1
             
-            df = pd.DataFrame(purchases, columns=[
-                'retailer_id', 'product_id', 'quantity', 'total_amount', 'purchase_date'
-            ])
+            self._invalidations_synced_to = checked_at
+            return invalidated
             
-            # Convert UUIDs to strings
-            df['retailer_id'] = df['retailer_id'].astype(str)
-            df['product_id'] = df['product_id'].astype(str)
+        except Exception as e:
+            logger.error(f"Error syncing recommendation cache invalidations: {e}")
+            return 0
+    
+    def fold_in_purchases(self, retailer_id: str, purchases: List[Tuple[str, int, float]],
+                          snapshot: Optional[ModelSnapshot] = None) -> bool:
+        """
+        Fold new purchases into a retailer's latent vector without retraining
+        
+        The retailer's rating row is updated and mapped onto the existing
+        item factors with the same step training used: the SVD projection,
+        or an exact least-squares solve for ALS. Unknown retailers are added;
+        products the snapshot has never seen cannot be folded in and only
+        count towards drift.
+        
+        Args:
+            retailer_id: Retailer who made the purchases
+            purchases: (product_id, quantity, total_amount) tuples
+            snapshot: Snapshot to update (defaults to the one being served)
             
-            # Create implicit rating based on quantity and amount
-            df['rating'] = np.log1p(df['quantity']) + np.log1p(df['total_amount']) / 10
-            df['rating'] = np.clip(df['rating'], 1, 5)
+        Returns:
+            True if the retailer's vector was updated
+        """
+        snapshot = snapshot or self.snapshot
+        if snapshot is None:
+            return False
+        
+        if not snapshot.partitions:
+            return self._fold_in_snapshot(snapshot, retailer_id, purchases)
+        
+        # Route each purchase to its partition and fold it in there
+        routed = defaultdict(list)
+        for purchase in purchases:
+            key = self._route_partition(snapshot, retailer_id, purchase[0])
+            if key is not None:
+                routed[key].append(purchase)
+        
+        updated = False
+        for key, partition_purchases in routed.items():
+            if self._fold_in_snapshot(snapshot.partitions[key], retailer_id, partition_purchases):
+                updated = True
+                with self._fold_in_lock:
+                    keys = snapshot.retailer_partitions.setdefault(retailer_id, [])
+                    if key not in keys:
+                        keys.append(key)
+        
+        return updated
+    
+    def _route_partition(self, snapshot: ModelSnapshot, retailer_id: str, product_id: str) -> Optional[str]:
+        """Return the partition a (retailer, product) interaction belongs to, if any"""
+        if snapshot.partition_by == 'store_type':
+            keys = snapshot.retailer_partitions.get(retailer_id)
+            if keys:
+                return keys[0]
+            retailer = Retailer.objects(retailer_id=retailer_id).only('store_type').first()
+            store_type = (retailer.store_type if retailer else None) or 'other'
+            return store_type if store_type in snapshot.partitions else None
+        
+        for key, partition in snapshot.partitions.items():
+            if product_id in partition.purchase_matrix.product_index:
+                return key
+        return None
+    
+    def _fold_in_snapshot(self, snapshot: ModelSnapshot, retailer_id: str,
+                          purchases: List[Tuple[str, int, float]]) -> bool:
+        """Fold purchases into one (global or partition) snapshot"""
+        try:
+            if snapshot.item_factors is None:
+                return False
+            
+            purchase_matrix = snapshot.purchase_matrix
+            
+            with self._fold_in_lock:
+                folded = snapshot.folded_retailers.get(retailer_id)
+                if folded is not None:
+                    ratings = dict(folded[1])
+                else:
+                    ratings = {}
+                    row = purchase_matrix.retailer_index.get(retailer_id)
+                    if row is not None:
+                        start, end = purchase_matrix.matrix.indptr[row:row + 2]
+                        for col, value in zip(purchase_matrix.matrix.indices[start:end],
+                                              purchase_matrix.matrix.data[start:end]):
+                            ratings[int(col)] = (float(value), 1)
+                
+                updated = False
+                for product_id, quantity, total_amount in purchases:
+                    snapshot.folded_interactions += 1
+                    col = purchase_matrix.product_index.get(product_id)
+                    if col is None:
+                        continue
+                    
+                    # Keep the per-cell average used when the matrix was built
+                    rating = float(self._implicit_rating(quantity, total_amount))
+                    total, count = ratings.get(col, (0.0, 0))
+                    ratings[col] = (total + rating, count + 1)
+                    updated = True
+                
+                if updated:
+                    cols = np.fromiter(ratings.keys(), dtype=np.int64, count=len(ratings))
+                    values = np.array([total / count for total, count in ratings.values()], dtype=np.float32)
+                    if isinstance(snapshot.collaborative_model, ImplicitALS):
+                        factors = snapshot.collaborative_model.fold_in(cols, values)
+                    else:
+                        factors = values @ snapshot.item_factors[cols]
+                    snapshot.folded_retailers[retailer_id] = (factors, ratings)
+            
+            # Fall back to a full refit once fold-ins make up a large share of the data
+            drift = snapshot.folded_interactions / max(purchase_matrix.matrix.nnz, 1)
+            if drift > Config.FOLD_IN_DRIFT_THRESHOLD:
+                self.start_background_training()
+            
+            return updated
             
-            return df
+        except Exception as e:
+            logger.error(f"Error folding in purchases for retailer {retailer_id}: {e}")
+            return False
+    
+    @staticmethod
+    def _implicit_rating(quantity, total_amount):
+        """Implicit rating in [1, 5] derived from purchase quantity and amount"""
+        return np.clip(np.log1p(quantity) + np.log1p(total_amount) / 10, 1, 5)
+    
+    def _should_retrain_models(self) -> bool:
+        """
+        Check if models should be retrained
+        
+        Retrains once new purchases, feedback or catalog changes since the
+        current snapshot cross their thresholds. MODEL_UPDATE_INTERVAL caps
+        how long smaller changes can wait; with no changes at all the
+        snapshot is kept indefinitely.
+        """
+        if self.last_training_time is None:
+            return True
+        
+        with self._counter_lock:
+            counters = dict(self.change_counters)
+        
+        thresholds = self._retrain_thresholds()
+        if any(counters[kind] >= threshold for kind, threshold in thresholds.items()):
+            return True
+        
+        if not any(counters.values()):
+            return False
+        
+        time_since_training = datetime.utcnow() - self.last_training_time
+        return time_since_training > timedelta(hours=Config.MODEL_UPDATE_INTERVAL)
+    
+    @staticmethod
+    def _retrain_thresholds() -> Dict[str, int]:
+        return {
+            'purchases': Config.RETRAIN_PURCHASE_THRESHOLD,
+            'feedback': Config.RETRAIN_FEEDBACK_THRESHOLD,
+            'catalog': Config.RETRAIN_CATALOG_THRESHOLD
+        }
+    
+    def refresh_change_counters(self):
+        """
+        Recount data changes since the current snapshot from MongoDB
+        
+        Local counters only see the writes this worker served, so they are
+        replaced with collection-wide counts, each capped at its threshold.
+        """
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.trained_at is None:
+            return
+        
+        try:
+            since = snapshot.trained_at
+            thresholds = self._retrain_thresholds()
+            counters = {
+                'purchases': Purchase._get_collection().count_documents(
+                    {'purchase_date': {'$gte': since}}, limit=thresholds['purchases']
+                ),
+                'feedback': Feedback._get_collection().count_documents(
+                    {'feedback_date': {'$gte': since}}, limit=thresholds['feedback']
+                ),
+                'catalog': Product._get_collection().count_documents(
+                    {'updated_date': {'$gte': since}}, limit=thresholds['catalog']
+                )
+            }
+            
+            with self._counter_lock:
+                # A snapshot published meanwhile has already reset the counters
+                if self.snapshot is snapshot:
+                    self.change_counters = counters
             
         except Exception as e:
-            logger.error(f"Error loading purchase data: {e}")
-            return pd.DataFrame()
+            logger.error(f"Error counting changes since snapshot {snapshot.version}: {e}")
+    
+    def _load_purchase_data(self, until: Optional[datetime] = None) -> PurchaseColumns:
+        """Load the last six months of purchases (before ``until``) as training columns"""
+        six_months_ago = datetime.utcnow() - timedelta(days=180)
+        return self.training_data.load_purchases(since=six_months_ago, until=until)
     
     def _load_product_data(self) -> pd.DataFrame:
         """Load product data for content-based filtering"""
+        return self.training_data.load_products()
+    
+    def _train_collaborative_model(self, snapshot: ModelSnapshot, purchase_data: PurchaseColumns):
+        """Train collaborative filtering model using matrix factorization"""
         try:
-            products = db.session.query(
-                Product.product_id,
-                Product.name,
-                Product.category,
-                Product.subcategory,
-                Product.brand,
-                Product.price,
-                Product.description,
-                Product.popularity_score
-            ).filter(Product.is_active == True).all()
-            
-            if not products:
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(products, columns=[
-                'product_id', 'name', 'category', 'subcategory', 'brand', 
-                'price', 'description', 'popularity_score'
-            ])
-            
-            df['product_id'] = df['product_id'].astype(str)
-            
-            # Create content features
-            df['content'] = (
-                df['name'].fillna('') + ' ' +
-                df['category'].fillna('') + ' ' +
-                df['subcategory'].fillna('') + ' ' +
-                df['brand'].fillna('') + ' ' +
-                df['description'].fillna('')
-            )
+            if purchase_data.empty:
+                return
             
-            return df
+            # Create sparse user-item matrix of implicit ratings
+            ratings = self._implicit_rating(purchase_data.quantity, purchase_data.total_amount)
+            purchase_matrix = purchase_data.to_matrix(ratings)
+            
+            started = time.perf_counter()
+            fitted = self._fit_collaborative_model(self.collaborative_algorithm, purchase_matrix.matrix)
+            if fitted is not None:
+                self._set_collaborative_state(snapshot, purchase_matrix, fitted)
+                logger.info(
+                    f"Collaborative model ({self.collaborative_algorithm}) trained with "
+                    f"{snapshot.item_factors.shape[1]} factors in {time.perf_counter() - started:.2f}s"
+                )
             
         except Exception as e:
-            logger.error(f"Error loading product data: {e}")
-            return pd.DataFrame()
+            logger.error(f"Error training collaborative model: {e}")
     
-    def _train_collaborative_model(self, purchase_data: pd.DataFrame):
-        """Train collaborative filtering model using matrix factorization"""
+    def _set_collaborative_state(self, snapshot: ModelSnapshot, purchase_matrix: PurchaseMatrix, fitted):
+        """Attach a fitted factorisation and its interaction matrix to a snapshot"""
+        collaborative_model, retailer_factors, item_factors = fitted
+        snapshot.collaborative_algorithm = self.collaborative_algorithm
+        snapshot.collaborative_model = collaborative_model
+        
+        # Store the user-item matrix for predictions
+        snapshot.purchase_matrix = purchase_matrix
+        
+        # Precompute latent factors so serving is a single dot product
+        snapshot.retailer_factors = np.ascontiguousarray(retailer_factors, dtype=np.float32)
+        snapshot.item_factors = np.ascontiguousarray(item_factors, dtype=np.float32)
+        
+        # Large catalogs are scored through an approximate index instead of every item
+        if len(snapshot.item_factors) >= Config.ANN_MIN_ITEMS:
+            snapshot.item_index = IVFIndex.build(
+                snapshot.item_factors, n_lists=Config.ANN_LISTS or None, n_probe=Config.ANN_PROBES
+            )
+    
+    def _train_partitioned_models(self, snapshot: ModelSnapshot, purchase_data: PurchaseColumns,
+                                  product_data: pd.DataFrame):
+        """
+        Train one collaborative model per product category or retailer store type
+        
+        Partitions are fitted in parallel worker processes. Each retailer is
+        later scored only by the partitions it has interactions in.
+        """
         try:
             if purchase_data.empty:
                 return
             
-            # Create user-item matrix
-            user_item_matrix = purchase_data.pivot_table(
-                index='retailer_id',
-                columns='product_id',
-                values='rating',
-                fill_value=0
+            started = time.perf_counter()
+            labels = self._partition_labels(Config.COLLABORATIVE_PARTITION_BY, purchase_data, product_data)
+            ratings = self._implicit_rating(purchase_data.quantity, purchase_data.total_amount)
+            
+            matrices = {}
+            for key in np.unique(labels):
+                mask = labels == key
+                matrices[str(key)] = purchase_data.subset(mask).to_matrix(ratings[mask])
+            
+            fitted = self._fit_partitions(matrices)
+            for key, purchase_matrix in matrices.items():
+                if fitted.get(key) is None:
+                    continue
+                partition = ModelSnapshot()
+                partition.version = snapshot.version
+                self._set_collaborative_state(partition, purchase_matrix, fitted[key])
+                snapshot.partitions[key] = partition
+            
+            snapshot.partition_by = Config.COLLABORATIVE_PARTITION_BY
+            snapshot.index_partitions()
+            logger.info(
+                f"Trained {len(snapshot.partitions)} collaborative partitions by "
+                f"{snapshot.partition_by} in {time.perf_counter() - started:.2f}s"
             )
             
-            # Apply SVD for matrix factorization
-            n_components = min(50, min(user_item_matrix.shape) - 1)
-            if n_components > 0:
-                self.collaborative_model = TruncatedSVD(n_components=n_components, random_state=42)
-                self.collaborative_model.fit(user_item_matrix)
-                
-                # Store the user-item matrix for predictions
-                self.user_item_matrix = user_item_matrix
-                
-                logger.info(f"Collaborative model trained with {n_components} components")
+        except Exception as e:
+            logger.error(f"Error training partitioned collaborative models: {e}")
+    
+    @staticmethod
+    def _partition_labels(partition_by: str, purchase_data: PurchaseColumns,
+                          product_data: pd.DataFrame) -> np.ndarray:
+        """Return the partition key of every purchase"""
+        if partition_by == 'category':
+            categories = dict(zip(product_data['product_id'], product_data['category']))
+            product_labels = np.array(
+                [categories.get(product_id) or 'other' for product_id in purchase_data.product_ids], dtype=object
+            )
+            return product_labels[purchase_data.product_codes]
+        
+        if partition_by == 'store_type':
+            store_types = {
+                str(doc['_id']): doc.get('store_type')
+                for doc in Retailer._get_collection().find(
+                    {'_id': {'$in': list(purchase_data.retailer_ids)}}, projection={'store_type': 1}
+                )
+            }
+            retailer_labels = np.array(
+                [store_types.get(retailer_id) or 'other' for retailer_id in purchase_data.retailer_ids], dtype=object
+            )
+            return retailer_labels[purchase_data.retailer_codes]
+        
+        raise ValueError(f"Unknown partition key: {partition_by}")
+    
+    def _fit_partitions(self, matrices: Dict[str, PurchaseMatrix]) -> Dict:
+        """Fit every partition in a process pool, falling back to this process on failure"""
+        try:
+            # Spawned workers avoid forking a process that is running other threads
+            with ProcessPoolExecutor(
+                max_workers=Config.PARTITION_TRAINING_PROCESSES or None,
+                mp_context=multiprocessing.get_context('spawn')
+            ) as pool:
+                futures = {
+                    key: pool.submit(_fit_partition, self.collaborative_algorithm, purchase_matrix.matrix)
+                    for key, purchase_matrix in matrices.items()
+                }
+                return {key: future.result() for key, future in futures.items()}
             
         except Exception as e:
-            logger.error(f"Error training collaborative model: {e}")
+            logger.error(f"Parallel partition training failed, training in-process: {e}")
+            return {
+                key: self._fit_collaborative_model(self.collaborative_algorithm, purchase_matrix.matrix)
+                for key, purchase_matrix in matrices.items()
+            }
     
-    def _train_content_model(self, product_data: pd.DataFrame):
+    @staticmethod
+    def _fit_collaborative_model(algorithm: str, matrix: sparse.csr_matrix):
+        """
+        Factorise the interaction matrix with the named algorithm
+        
+        Args:
+            algorithm: 'svd' (TruncatedSVD) or 'als' (implicit ALS)
+            matrix: Retailer x product matrix of implicit ratings
+            
+        Returns:
+            (model, retailer_factors, item_factors) or None if the matrix is too small
+        """
+        n_components = min(50, min(matrix.shape) - 1)
+        if n_components <= 0:
+            return None
+        
+        if algorithm == 'als':
+            model = ImplicitALS(
+                factors=min(Config.ALS_FACTORS, n_components),
+                regularization=Config.ALS_REGULARIZATION,
+                alpha=Config.ALS_ALPHA,
+                iterations=Config.ALS_ITERATIONS,
+                cg_steps=Config.ALS_CG_STEPS,
+                num_threads=Config.ALS_THREADS
+            ).fit(matrix)
+            return model, model.user_factors, model.item_factors
+        
+        if algorithm != 'svd':
+            raise ValueError(f"Unknown collaborative algorithm: {algorithm}")
+        
+        model = TruncatedSVD(n_components=n_components, random_state=42)
+        model.fit(matrix)
+        return model, model.transform(matrix), model.components_.T
+    
+    def compare_collaborative_models(self) -> Dict[str, Dict]:
+        """
+        Train every collaborative algorithm on the same purchase data
+        
+        Returns:
+            Per algorithm: training seconds, peak traced memory (MB) and factor size (MB)
+        """
+        purchase_data = self._load_purchase_data()
+        if purchase_data.empty:
+            return {}
+        
+        ratings = self._implicit_rating(purchase_data.quantity, purchase_data.total_amount)
+        matrix = purchase_data.to_matrix(ratings).matrix
+        
+        report = {}
+        for algorithm in ('svd', 'als'):
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                fitted = self._fit_collaborative_model(algorithm, matrix)
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            
+            if fitted is None:
+                continue
+            
+            _, retailer_factors, item_factors = fitted
+            report[algorithm] = {
+                'training_seconds': round(elapsed, 3),
+                'peak_memory_mb': round(peak / 2 ** 20, 2),
+                'factor_memory_mb': round((retailer_factors.nbytes + item_factors.nbytes) / 2 ** 20, 2),
+                'factors': int(item_factors.shape[1])
+            }
+        
+        report['interactions'] = {'retailers': matrix.shape[0], 'products': matrix.shape[1], 'nnz': int(matrix.nnz)}
+        return report
+    
+    def _train_content_model(self, snapshot: ModelSnapshot, product_data: pd.DataFrame):
         """Train content-based model using TF-IDF"""
         try:
             if product_data.empty:
                 return
             
             # Fit TF-IDF vectorizer
-            content_features = self.tfidf_vectorizer.fit_transform(product_data['content'])
-            
-            # Calculate product similarity matrix
-            self.content_similarity = cosine_similarity(content_features)
-            self.product_indices = dict(zip(product_data['product_id'], range(len(product_data))))
-            self.products_df = product_data
+            content_features = snapshot.tfidf_vectorizer.fit_transform(product_data['content'])
+            
+            # Build top-k product neighbour index
+            snapshot.content_index = NeighborIndex.build(
+                content_features,
+                k=Config.SIMILARITY_TOP_K,
+                chunk_size=Config.SIMILARITY_CHUNK_SIZE,
+                ann_min_items=Config.ANN_MIN_ITEMS,
+                ann_lists=Config.ANN_LISTS or None,
+                ann_probes=Config.ANN_PROBES
+            )
+            snapshot.product_indices = dict(zip(product_data['product_id'], range(len(product_data))))
+            snapshot.content_product_ids = product_data['product_id'].to_numpy()
             
             logger.info("Content-based model trained successfully")
             
         except Exception as e:
             logger.error(f"Error training content model: {e}")
     
-    def _get_collaborative_recommendations(self, retailer_id: str, num_recs: int) -> List[Tuple[str, float]]:
+    def _get_collaborative_recommendations(self, snapshot: ModelSnapshot, retailer_id: str,
+                                          num_recs: int) -> List[Tuple[str, float]]:
         """Get recommendations using collaborative filtering"""
+        return self._get_collaborative_recommendations_batch(snapshot, [retailer_id], num_recs).get(retailer_id, [])
+    
+    def _get_collaborative_recommendations_batch(self, snapshot: ModelSnapshot, retailer_ids: List[str],
+                                                num_recs: int) -> Dict[str, List[Tuple[str, float]]]:
+        """Get collaborative filtering recommendations for many retailers with one matrix product"""
+        if snapshot.partitions:
+            return self._get_partitioned_recommendations_batch(snapshot, retailer_ids, num_recs)
+        
         try:
-            if self.collaborative_model is None or not hasattr(self, 'user_item_matrix'):
-                return []
-            
-            if retailer_id not in self.user_item_matrix.index:
-                return []
-            
-            # Get user vector
-            user_vector = self.user_item_matrix.loc[retailer_id].values.reshape(1, -1)
-            
-            # Transform using SVD
-            user_factors = self.collaborative_model.transform(user_vector)
+            if snapshot.item_factors is None:
+                return {}
+            
+            scored_ids = []
+            retailer_factors = []
+            rated_cols = []
+            matrix = snapshot.purchase_matrix.matrix
+            
+            for retailer_id in retailer_ids:
+                # Prefer a vector updated by fold-in over the trained one
+                folded = snapshot.folded_retailers.get(retailer_id)
+                if folded is not None:
+                    factors, ratings = folded
+                    rated_cols.append(np.fromiter(ratings.keys(), dtype=np.int64, count=len(ratings)))
+                else:
+                    row = snapshot.purchase_matrix.retailer_index.get(retailer_id)
+                    if row is None:
+                        continue
+                    factors = snapshot.retailer_factors[row]
+                    rated_cols.append(matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]])
+                
+                scored_ids.append(retailer_id)
+                retailer_factors.append(factors)
             
-            # Reconstruct ratings
-            reconstructed = self.collaborative_model.inverse_transform(user_factors)
+            if not scored_ids:
+                return {}
             
-            # Get product recommendations
-            product_scores = list(zip(self.user_item_matrix.columns, reconstructed[0]))
+            if snapshot.item_index is not None:
+                return self._search_collaborative_candidates(
+                    snapshot, scored_ids, np.vstack(retailer_factors), rated_cols, num_recs
+                )
             
-            # Sort by score and filter out already rated items
-            user_rated_items = set(self.user_item_matrix.loc[retailer_id][
-                self.user_item_matrix.loc[retailer_id] > 0
-            ].index)
+            # Reconstructed ratings for every (retailer, product) pair
+            scores = np.vstack(retailer_factors) @ snapshot.item_factors.T
             
-            recommendations = [
-                (product_id, score) for product_id, score in product_scores
-                if product_id not in user_rated_items and score > 0
-            ]
+            recommendations = {}
+            for i, retailer_id in enumerate(scored_ids):
+                # Mask already rated items and keep positive scores only
+                row_scores = scores[i]
+                row_scores[rated_cols[i]] = 0
+                candidates = np.flatnonzero(row_scores > 0)
+                top = candidates[top_k_indices(row_scores[candidates], num_recs)]
+                
+                recommendations[retailer_id] = [
+                    (snapshot.purchase_matrix.product_ids[idx], float(row_scores[idx]))
+                    for idx in top
+                ]
             
-            recommendations.sort(key=lambda x: x[1], reverse=True)
-            return recommendations[:num_recs]
+            return recommendations
             
         except Exception as e:
             logger.error(f"Error in collaborative filtering: {e}")
-            return []
+            return {}
+    
+    def _get_partitioned_recommendations_batch(self, snapshot: ModelSnapshot, retailer_ids: List[str],
+                                               num_recs: int) -> Dict[str, List[Tuple[str, float]]]:
+        """Score each retailer only in the partitions it belongs to and merge the results"""
+        retailers_by_partition = defaultdict(list)
+        for retailer_id in retailer_ids:
+            for key in snapshot.retailer_partitions.get(retailer_id, ()):
+                retailers_by_partition[key].append(retailer_id)
+        
+        merged = defaultdict(list)
+        for key, partition_retailers in retailers_by_partition.items():
+            partition_recs = self._get_collaborative_recommendations_batch(
+                snapshot.partitions[key], partition_retailers, num_recs
+            )
+            for retailer_id, recs in partition_recs.items():
+                merged[retailer_id].extend(recs)
+        
+        return {
+            retailer_id: sorted(recs, key=lambda rec: rec[1], reverse=True)[:num_recs]
+            for retailer_id, recs in merged.items()
+        }
+    
+    def _search_collaborative_candidates(self, snapshot: ModelSnapshot, retailer_ids: List[str],
+                                         retailer_factors: np.ndarray, rated_cols: List[np.ndarray],
+                                         num_recs: int) -> Dict[str, List[Tuple[str, float]]]:
+        """Score only the items in each retailer's probed IVF lists"""
+        results = snapshot.item_index.search(retailer_factors, num_recs, exclude=rated_cols)
+        
+        recommendations = {}
+        for retailer_id, (items, scores) in zip(retailer_ids, results):
+            positive = scores > 0
+            recommendations[retailer_id] = [
+                (snapshot.purchase_matrix.product_ids[idx], float(score))
+                for idx, score in zip(items[positive], scores[positive])
+            ]
+        
+        return recommendations
     
-    def _get_content_based_recommendations(self, retailer_id: str, num_recs: int) -> List[Tuple[str, float]]:
+    def _get_content_based_recommendations(self, snapshot: ModelSnapshot, retailer_id: str,
+                                           num_recs: int) -> List[Tuple[str, float]]:
         """Get recommendations using content-based filtering"""
+        return self._get_content_based_recommendations_batch(snapshot, [retailer_id], num_recs).get(retailer_id, [])
+    
+    def _get_content_based_recommendations_batch(self, snapshot: ModelSnapshot, retailer_ids: List[str],
+                                                 num_recs: int) -> Dict[str, List[Tuple[str, float]]]:
+        """Get content-based recommendations for many retailers with one sparse matrix product"""
         try:
-            if not hasattr(self, 'content_similarity') or not hasattr(self, 'products_df'):
-                return []
-            
-            # Get retailer's purchase history
-            retailer_purchases = Purchase.query.filter_by(retailer_id=retailer_id).all()
+            if snapshot.content_index is None:
+                return {}
+            
+            # Get the retailers' purchase history with one query
+            purchased_products = {retailer_id: [] for retailer_id in retailer_ids}
+            for retailer_id, product_id in Purchase.objects(
+                retailer_id__in=retailer_ids
+            ).values_list('retailer_id', 'product_id'):
+                purchased_products[str(retailer_id)].append(str(product_id))
+            
+            recommendations = {}
+            
+            # Retailers without history get popular products
+            new_retailers = [r for r in retailer_ids if not purchased_products[r]]
+            if new_retailers:
+                popular_products = self._get_popular_products(num_recs)
+                for retailer_id in new_retailers:
+                    recommendations[retailer_id] = list(popular_products)
+            
+            scored_ids = [r for r in retailer_ids if purchased_products[r]]
+            if not scored_ids:
+                return recommendations
             
-            if not retailer_purchases:
-                return self._get_popular_products(num_recs)
+            # Count purchases per (retailer, catalog row)
+            rows, cols = [], []
+            for i, retailer_id in enumerate(scored_ids):
+                for product_id in purchased_products[retailer_id]:
+                    col = snapshot.product_indices.get(product_id)
+                    if col is not None:
+                        rows.append(i)
+                        cols.append(col)
+            
+            n_products = len(snapshot.content_index)
+            purchase_counts = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                shape=(len(scored_ids), n_products)
+            )
             
-            # Get purchased product IDs
-            purchased_products = [str(p.product_id) for p in retailer_purchases]
+            # Sum neighbour similarities of every purchased product in one pass
+            content_scores = (purchase_counts @ snapshot.content_index.to_sparse()).toarray()
             
-            # Calculate content-based scores
-            content_scores = {}
+            for i, retailer_id in enumerate(scored_ids):
+                # Exclude already purchased products and take the top-k
+                row_scores = content_scores[i]
+                row_scores[purchase_counts.indices[purchase_counts.indptr[i]:purchase_counts.indptr[i + 1]]] = 0
+                candidates = np.flatnonzero(row_scores > 0)
+                top = candidates[top_k_indices(row_scores[candidates], num_recs)]
+                
+                recommendations[retailer_id] = [
+                    (snapshot.content_product_ids[idx], float(row_scores[idx]))
+                    for idx in top
+                ]
             
-            for product_id in purchased_products:
-                if product_id in self.product_indices:
-                    product_idx = self.product_indices[product_id]
-                    similar_products = list(enumerate(self.content_similarity[product_idx]))
-                    
-                    for idx, similarity in similar_products:
-                        target_product_id = self.products_df.iloc[idx]['product_id']
-                        
-                        if target_product_id not in purchased_products:
-                            if target_product_id not in content_scores:
-                                content_scores[target_product_id] = 0
-                            content_scores[target_product_id] += similarity
-            
-            # Sort and return top recommendations
-            recommendations = sorted(content_scores.items(), key=lambda x: x[1], reverse=True)
-            return recommendations[:num_recs]
+            return recommendations
             
         except Exception as e:
             logger.error(f"Error in content-based filtering: {e}")
-            return []
+            return {}
     
     def _get_popular_products(self, num_recs: int) -> List[Tuple[str, float]]:
         """Get popular products as fallback"""
         try:
-            popular_products = Product.query.filter(
-                Product.is_active == True
-            ).order_by(
-                Product.popularity_score.desc()
-            ).limit(num_recs).all()
-            
-            return [(str(p.product_id), float(p.popularity_score)) for p in popular_products]
+            # Recent purchases dominate; popularity score keeps unpurchased products ranked
+            return [
+                (product['product_id'], product['purchase_count'] + product['popularity_score'] / 10)
+                for product in popularity_leaderboard.ensure_fresh().top(num_recs)
+            ]
             
         except Exception as e:
             logger.error(f"Error getting popular products: {e}")
             return []
     
-    def _combine_recommendations(self, collaborative_recs: List[Tuple[str, float]], 
-                               content_recs: List[Tuple[str, float]], 
-                               retailer_id: str, num_recs: int) -> List[Dict]:
-        """Combine collaborative and content-based recommendations"""
-        try:
-            # Convert to dictionaries for easier manipulation
-            collab_dict = dict(collaborative_recs)
-            content_dict = dict(content_recs)
-            
-            # Get all unique product IDs
-            all_products = set(collab_dict.keys()) | set(content_dict.keys())
-            
-            # Calculate hybrid scores
-            hybrid_scores = []
+    def _run_stage(self, stage: str, tasks: Dict, deadline: float) -> Dict:
+        """
+        Run pipeline tasks concurrently until a deadline
+        
+        Args:
+            stage: Stage name used in logs
+            tasks: Name -> zero-argument callable
+            deadline: time.monotonic() value after which pending tasks are dropped
             
-            for product_id in all_products:
-                collab_score = collab_dict.get(product_id, 0)
-                content_score = content_dict.get(product_id, 0)
-                
-                # Weighted combination (60% collaborative, 40% content-based)
-                hybrid_score = 0.6 * collab_score + 0.4 * content_score
-                
-                # Get product details
-                product = Product.query.get(product_id)
-                if product:
-                    hybrid_scores.append({
-                        'product_id': product_id,
-                        'product': product.to_dict(),
-                        'score': hybrid_score,
-                        'collaborative_score': collab_score,
-                        'content_score': content_score,
-                        'recommendation_type': 'hybrid'
-                    })
-            
-            # Sort by hybrid score
-            hybrid_scores.sort(key=lambda x: x['score'], reverse=True)
-            
-            return hybrid_scores[:num_recs]
+        Returns:
+            Results of the tasks that finished in time without raising
+        """
+        started = time.monotonic()
+        futures = {self._pipeline_executor.submit(task): name for name, task in tasks.items()}
+        done, pending = wait(futures, timeout=max(deadline - started, 0))
+        
+        results = {}
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                logger.error(f"{stage} task {futures[future]} failed: {e}")
+        
+        for future in pending:
+            # Already running tasks finish in the background; their results are discarded
+            future.cancel()
+            logger.warning(f"{stage} task {futures[future]} missed its deadline; continuing without it")
+        
+        logger.debug(f"{stage} stage finished in {(time.monotonic() - started) * 1000:.1f}ms")
+        return results
+    
+    def _get_trending_candidates(self, num_recs: int) -> List[Tuple[str, float]]:
+        """Products with the highest time-decayed purchase counts"""
+        return [
+            (product_id, recent_purchases)
+            for product_id, _, recent_purchases in trending_products.ensure_fresh().top(num_recs)
+        ]
+    
+    def _get_popular_candidates(self, num_recs: int) -> List[Tuple[str, float]]:
+        """Most popular active products from the precomputed leaderboard"""
+        return self._get_popular_products(num_recs)
+    
+    def _rank_candidates(self, candidates: Dict[str, List[Tuple[str, float]]], products: Dict[str, Dict],
+                         purchased_product_ids: set, preferences: List[RetailerPreference],
+                         num_recs: int) -> List[Dict]:
+        """
+        Score the union of all candidate sources in one vectorised pass
+        
+        Each source's scores are normalised by its maximum and combined with
+        RANKING_WEIGHTS. Recently purchased and unknown products are removed
+        and retailer category/brand preferences are applied as boosts.
+        
+        Args:
+            candidates: Source name -> (product_id, score) list
+            products: Hydrated product summaries by product id
+            purchased_product_ids: Products the retailer bought recently
+            preferences: Retailer preferences for the business-rule boosts
+            num_recs: Number of recommendations to return
             
-        except Exception as e:
-            logger.error(f"Error combining recommendations: {e}")
+        Returns:
+            Ranked recommendations, best first
+        """
+        product_ids = [
+            product_id
+            for product_id in dict.fromkeys(product_id for recs in candidates.values() for product_id, _ in recs)
+            if product_id in products and product_id not in purchased_product_ids
+        ]
+        if not product_ids:
             return []
+        
+        positions = {product_id: i for i, product_id in enumerate(product_ids)}
+        scores = np.zeros(len(product_ids))
+        source_scores = {}
+        
+        for source, recs in candidates.items():
+            column = np.zeros(len(product_ids))
+            for product_id, score in recs:
+                i = positions.get(product_id)
+                if i is not None:
+                    column[i] = score
+            source_scores[source] = column
+            
+            peak = column.max()
+            if peak > 0:
+                scores += self.RANKING_WEIGHTS.get(source, 0) * column / peak
+        
+        # Business rules: up to 20% boost for preferred categories and 15% for brands
+        category_preferences = {}
+        brand_preferences = {}
+        for pref in preferences:
+            if pref.category:
+                category_preferences[pref.category] = float(pref.preference_score)
+            if pref.brand:
+                brand_preferences[pref.brand] = float(pref.preference_score)
+        
+        if category_preferences:
+            scores *= 1 + np.array([
+                category_preferences.get(products[product_id].get('category'), 0) for product_id in product_ids
+            ]) / 5.0 * 0.2
+        if brand_preferences:
+            scores *= 1 + np.array([
+                brand_preferences.get(products[product_id].get('brand'), 0) for product_id in product_ids
+            ]) / 5.0 * 0.15
+        
+        empty = np.zeros(len(product_ids))
+        collaborative_scores = source_scores.get('collaborative', empty)
+        content_scores = source_scores.get('content', empty)
+        
+        return [
+            {
+                'product_id': product_ids[i],
+                'product': products[product_ids[i]],
+                'score': float(scores[i]),
+                'collaborative_score': float(collaborative_scores[i]),
+                'content_score': float(content_scores[i]),
+                'recommendation_type': 'hybrid'
+            }
+            for i in top_k_indices(scores, num_recs)
+        ]
     
-    def _filter_purchased_products(self, retailer_id: str, recommendations: List[Dict]) -> List[Dict]:
-        """Filter out products already purchased by the retailer"""
+    def _fetch_products(self, product_ids) -> Dict[str, Dict]:
+        """Fetch product summaries for many products with one projected query"""
         try:
-            # Get recently purchased products (last 30 days)
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            
-            recent_purchases = db.session.query(Purchase.product_id).filter(
-                Purchase.retailer_id == retailer_id,
-                Purchase.purchase_date >= thirty_days_ago
-            ).all()
-            
-            purchased_product_ids = {str(p.product_id) for p in recent_purchases}
-            
-            # Filter recommendations
-            filtered = [
-                rec for rec in recommendations
-                if rec['product_id'] not in purchased_product_ids
-            ]
-            
-            return filtered
+            return {
+                str(doc['_id']): product_summary(doc)
+                for doc in Product.objects(
+                    product_id__in=list(product_ids)
+                ).only(*PRODUCT_SUMMARY_FIELDS).as_pymongo()
+            }
             
         except Exception as e:
-            logger.error(f"Error filtering purchased products: {e}")
-            return recommendations
+            logger.error(f"Error fetching products: {e}")
+            return {}
     
-    def _apply_business_rules(self, retailer_id: str, recommendations: List[Dict]) -> List[Dict]:
-        """Apply business rules to recommendations"""
-        try:
-            # Get retailer preferences
-            preferences = RetailerPreference.query.filter_by(retailer_id=retailer_id).all()
-            
-            if not preferences:
-                return recommendations
-            
-            # Create preference lookup
-            category_preferences = {}
-            brand_preferences = {}
-            
-            for pref in preferences:
-                if pref.category:
-                    category_preferences[pref.category] = float(pref.preference_score)
-                if pref.brand:
-                    brand_preferences[pref.brand] = float(pref.preference_score)
-            
-            # Adjust scores based on preferences
-            for rec in recommendations:
-                product = rec['product']
-                
-                # Category preference boost
-                if product['category'] in category_preferences:
-                    boost = category_preferences[product['category']] / 5.0  # Normalize to 0-1
-                    rec['score'] *= (1 + boost * 0.2)  # Up to 20% boost
-                
-                # Brand preference boost
-                if product['brand'] in brand_preferences:
-                    boost = brand_preferences[product['brand']] / 5.0
-                    rec['score'] *= (1 + boost * 0.15)  # Up to 15% boost
-            
-            # Re-sort by adjusted scores
-            recommendations.sort(key=lambda x: x['score'], reverse=True)
-            
-            return recommendations
-            
-        except Exception as e:
-            logger.error(f"Error applying business rules: {e}")
-            return recommendations
+    def _load_recent_purchases(self, retailer_ids: List[str], days: int = 30) -> Dict[str, set]:
+        """Load the products each retailer bought recently with one query"""
+        since = datetime.utcnow() - timedelta(days=days)
+        
+        recent_purchases = {}
+        for retailer_id, product_id in Purchase.objects(
+            retailer_id__in=retailer_ids,
+            purchase_date__gte=since
+        ).values_list('retailer_id', 'product_id'):
+            recent_purchases.setdefault(str(retailer_id), set()).add(str(product_id))
+        
+        return recent_purchases
+    
+    def _load_preferences(self, retailer_ids: List[str]) -> Dict[str, List[RetailerPreference]]:
+        """Load preferences for many retailers with one query"""
+        preferences = {}
+        for preference in RetailerPreference.objects(retailer_id__in=retailer_ids):
+            preferences.setdefault(str(preference.retailer_id), []).append(preference)
+        
+        return preferences
     
     def _store_recommendations(self, retailer_id: str, recommendations: List[Dict]):
         """Store recommendations in database for tracking"""
+        self._store_recommendations_batch({retailer_id: recommendations})
+    
+    def _store_recommendations_batch(self, recommendations_by_retailer: Dict[str, List[Dict]]):
+        """Queue recommendations for many retailers on the write-behind queue"""
         try:
-            from backend.models.database import Recommendation
-            
-            for rec in recommendations:
-                recommendation = Recommendation(
+            documents = [
+                Recommendation(
                     retailer_id=retailer_id,
                     product_id=rec['product_id'],
-                    recommendation_score=rec['score'],
+                    # The tracking model stores scores in [0, 1]
+                    recommendation_score=min(max(rec['score'], 0.0), 1.0),
                     recommendation_type=rec['recommendation_type'],
                     algorithm_version='v1.0',
                     context={
@@ -449,23 +1502,30 @@ class RecommendationEngine:
                         'content_score': rec.get('content_score', 0)
                     }
                 )
-                db.session.add(recommendation)
+                for retailer_id, recommendations in recommendations_by_retailer.items()
+                for rec in recommendations
+            ]
+            
+            operations = []
+            for document in documents:
+                document.validate()
+                operations.append(InsertOne(document.to_mongo().to_dict()))
             
-            db.session.commit()
+            if operations:
+                self.write_queue.submit_many(Recommendation, operations)
             
         except Exception as e:
             logger.error(f"Error storing recommendations: {e}")
-            db.session.rollback()
     
     def _get_fallback_recommendations(self, retailer_id: str, num_recs: int) -> List[Dict]:
         """Get fallback recommendations when models fail"""
         try:
             # Get popular products in retailer's preferred categories
-            retailer = Retailer.query.get(retailer_id)
+            retailer = Retailer.objects(retailer_id=retailer_id).only('store_type').first()
+            leaderboard = popularity_leaderboard.ensure_fresh()
+            products = []
             
-            query = Product.query.filter(Product.is_active == True)
-            
-            # If retailer has a store type, filter by related categories
+            # If retailer has a store type, read the related category's leaderboard
             if retailer and retailer.store_type:
                 category_mapping = {
                     'Grocery Store': 'Food & Beverages',
@@ -477,15 +1537,16 @@ class RecommendationEngine:
                 
                 preferred_category = category_mapping.get(retailer.store_type)
                 if preferred_category:
-                    query = query.filter(Product.category == preferred_category)
+                    products = leaderboard.top(num_recs, preferred_category)
             
-            products = query.order_by(Product.popularity_score.desc()).limit(num_recs).all()
+            if not products:
+                products = leaderboard.top(num_recs)
             
             recommendations = []
             for i, product in enumerate(products):
                 recommendations.append({
-                    'product_id': str(product.product_id),
-                    'product': product.to_dict(),
+                    'product_id': product['product_id'],
+                    'product': product,
                     'score': 1.0 - (i * 0.1),  # Decreasing score
                     'collaborative_score': 0,
                     'content_score': 0,
@@ -511,26 +1572,27 @@ class RecommendationEngine:
                 context={'source': 'api'}
             )
             
-            db.session.add(feedback)
-            db.session.commit()
+            feedback.validate()
+            self.write_queue.submit(Feedback, InsertOne(feedback.to_mongo().to_dict()))
             
             # Update recommendation tracking if applicable
-            if recommendation_id:
-                from backend.models.database import Recommendation
-                recommendation = Recommendation.query.get(recommendation_id)
-                if recommendation:
-                    if feedback_type == 'click':
-                        recommendation.was_clicked = True
-                    elif feedback_type == 'purchase':
-                        recommendation.was_purchased = True
-                    
-                    db.session.commit()
-            
+            tracking_fields = {'click': 'was_clicked', 'purchase': 'was_purchased'}
+            if recommendation_id and feedback_type in tracking_fields:
+                self.write_queue.submit(Recommendation, UpdateOne(
+                    {'_id': recommendation_id},
+                    {'$set': {tracking_fields[feedback_type]: True}}
+                ))
+            
+            self._count_change('feedback')
+            self.invalidate_retailer(retailer_id)
             logger.info(f"Recorded feedback: {feedback_type} for product {product_id} by retailer {retailer_id}")
             
         except Exception as e:
             logger.error(f"Error recording feedback: {e}")
-            db.session.rollback()
+
+def _fit_partition(algorithm: str, matrix: sparse.csr_matrix):
+    """Process pool entry point for fitting one partition"""
+    return RecommendationEngine._fit_collaborative_model(algorithm, matrix)
 
 # Global recommendation engine instance
 recommendation_engine = RecommendationEngine()
@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify, session
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime
 from backend.models.mongodb_models import Retailer
+from backend.models.recommendation import recommendation_engine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -161,6 +162,9 @@ def update_profile():
         
         current_user.save()
         
+        # Store type and profile data feed the recommendation rules
+        recommendation_engine.invalidate_retailer(str(current_user.retailer_id))
+        
         logger.info(f"Profile updated for retailer {current_user.email}")
         
         return jsonify({
@@ -10,6 +10,7 @@ from backend.services.ai_recommendation_service import ai_recommendation_service
 from backend.services.location_service import location_service
 from backend.services.analytics_service import analytics_service
 from backend.services.product_data_service import product_data_service
+from backend.models.recommendation import recommendation_engine
 from backend.models.mongodb_models import Product, Purchase, Retailer
 
 logger = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ def get_personalized_recommendations():
             return jsonify({'error': 'retailer_id is required'}), 400
         
         # Initialize AI models if not already done
-        ai_recommendation_service.initialize_models()
+        ai_recommendation_service.ensure_models()
         
         # Get personalized recommendations
         recommendations = ai_recommendation_service.get_personalized_recommendations(
@@ -360,7 +361,20 @@ def get_real_time_analytics():
 def populate_products():
     """Populate database with comprehensive product catalog"""
     try:
-        result = product_data_service.populate_database()
+        data = request.get_json(silent=True) or {}
+        result = product_data_service.populate_database(replace=bool(data.get('replace', True)))
+        if result['success']:
+            product_ids = result.pop('product_ids', [])
+            recommendation_engine.record_catalog_change(
+                result['products_created'] + result['products_updated']
+            )
+            
+            # A replaced catalog has new product ids, so every AI model is rebuilt;
+            # otherwise only the written products are folded into the clusters
+            if result.get('catalog_replaced'):
+                ai_recommendation_service.start_background_initialization()
+            else:
+                ai_recommendation_service.assign_products(Product.objects(pk__in=product_ids))
         
         return jsonify({
             'success': result['success'],
@@ -495,6 +509,7 @@ def services_health_check():
         return jsonify({
             'success': True,
             'services': services_status,
+            'write_behind': recommendation_engine.write_queue.metrics(),
             'timestamp': datetime.now().isoformat()
         })
         
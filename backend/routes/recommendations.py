@@ -4,15 +4,25 @@ Recommendation API routes for the Retailer Recommendation System
 
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
+from mongoengine.errors import ValidationError
 from datetime import datetime, timedelta
 from backend.models.mongodb_models import Retailer, Product, Purchase, Feedback, Recommendation
 from backend.models.recommendation import recommendation_engine
+from backend.services.ai_recommendation_service import ai_recommendation_service
+from config import Config
+import hmac
 import logging
 
 logger = logging.getLogger(__name__)
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
+def _has_service_token() -> bool:
+    """Check the request for the configured service credential"""
+    token = Config.SERVICE_API_TOKEN
+    provided = request.headers.get('X-Service-Token', '')
+    return bool(token) and hmac.compare_digest(provided.encode(), token.encode())
+
 @recommendations_bp.route('/recommendations/<retailer_id>', methods=['GET'])
 @login_required
 def get_recommendations(retailer_id):
@@ -46,18 +56,61 @@ def get_recommendations(retailer_id):
         logger.error(f"Error getting recommendations for retailer {retailer_id}: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@recommendations_bp.route('/recommendations/batch', methods=['POST'])
+@login_required
+def get_recommendations_batch():
+    """Get product recommendations for many retailers in one call (service credential required for other retailers)"""
+    try:
+        data = request.get_json() or {}
+        
+        retailer_ids = data.get('retailer_ids')
+        if not retailer_ids or not isinstance(retailer_ids, list):
+            return jsonify({'error': 'retailer_ids must be a non-empty list'}), 400
+        
+        # Check if current user can access every requested retailer's data
+        caller_id = str(current_user.retailer_id)
+        if any(str(retailer_id) != caller_id for retailer_id in retailer_ids) and not _has_service_token():
+            return jsonify({'error': 'Access denied'}), 403
+        
+        if len(retailer_ids) > Config.BATCH_MAX_RETAILERS:
+            return jsonify({'error': f'At most {Config.BATCH_MAX_RETAILERS} retailer_ids per request'}), 400
+        
+        num_recommendations = int(data.get('count', 10))
+        num_recommendations = min(max(num_recommendations, 1), 50)  # Limit between 1-50
+        
+        # Score all retailers together
+        recommendations = recommendation_engine.get_recommendations_batch(retailer_ids, num_recommendations)
+        
+        return jsonify({
+            'recommendations': recommendations,
+            'count': len(recommendations),
+            'generated_at': datetime.utcnow().isoformat()
+        }), 200
+        
+    except (TypeError, ValueError):
+        return jsonify({'error': 'count must be an integer'}), 400
+    except Exception as e:
+        logger.error(f"Error getting batch recommendations: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @recommendations_bp.route('/recommendations/train', methods=['POST'])
 @login_required
 def train_models():
     """Manually trigger model training (admin only)"""
     try:
         # In a real application, you'd check for admin privileges here
-        recommendation_engine.train_models()
+        started = recommendation_engine.start_background_training()
+        
+        if not started:
+            return jsonify({
+                'message': 'Model training already in progress',
+                'timestamp': datetime.utcnow().isoformat()
+            }), 200
         
         return jsonify({
             'message': 'Model training initiated successfully',
             'timestamp': datetime.utcnow().isoformat()
-        }), 200
+        }), 202
         
     except Exception as e:
         logger.error(f"Error training models: {e}")
@@ -88,8 +141,7 @@ def submit_feedback():
             return jsonify({'error': f'Invalid feedback type. Must be one of: {valid_feedback_types}'}), 400
         
         # Validate product exists
-        product = Product.query.get(product_id)
-        if not product:
+        if not Product.objects(product_id=product_id).count():
             return jsonify({'error': 'Product not found'}), 404
         
         # Record feedback
@@ -111,6 +163,57 @@ def submit_feedback():
         logger.error(f"Error submitting feedback: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@recommendations_bp.route('/purchases', methods=['POST'])
+@login_required
+def record_purchase():
+    """Record a purchase and fold it into the live recommendation models"""
+    try:
+        data = request.get_json() or {}
+        
+        # Validate required fields
+        required_fields = ['product_id', 'quantity']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        quantity = int(data['quantity'])
+        if quantity < 1:
+            return jsonify({'error': 'quantity must be at least 1'}), 400
+        
+        # Validate product exists
+        product = Product.objects(product_id=data['product_id']).first()
+        if not product:
+            return jsonify({'error': 'Product not found'}), 404
+        
+        unit_price = float(data.get('unit_price', product.price))
+        purchase = Purchase(
+            retailer_id=str(current_user.retailer_id),
+            product_id=str(product.product_id),
+            quantity=quantity,
+            unit_price=unit_price,
+            total_amount=unit_price * quantity,
+            payment_method=data.get('payment_method'),
+            order_source=data.get('order_source', 'api')
+        )
+        purchase.save()
+        
+        # Update the retailer's recommendations without waiting for a retrain
+        recommendation_engine.record_purchase(purchase)
+        ai_recommendation_service.record_purchase(purchase)
+        
+        return jsonify({
+            'message': 'Purchase recorded successfully',
+            'purchase': purchase.to_dict()
+        }), 201
+        
+    except (TypeError, ValueError):
+        return jsonify({'error': 'quantity and unit_price must be numeric'}), 400
+    except ValidationError as e:
+        return jsonify({'error': f'Invalid purchase: {e.message}'}), 400
+    except Exception as e:
+        logger.error(f"Error recording purchase: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @recommendations_bp.route('/retailers/<retailer_id>/history', methods=['GET'])
 @login_required
 def get_purchase_history(retailer_id):
@@ -185,6 +288,28 @@ def get_purchase_history(retailer_id):
         logger.error(f"Error getting purchase history for retailer {retailer_id}: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@recommendations_bp.route('/retailers/<retailer_id>/similar', methods=['GET'])
+@login_required
+def get_similar_retailers(retailer_id):
+    """Get the retailers with the most similar purchase histories"""
+    try:
+        # Check access permissions
+        if str(current_user.retailer_id) != retailer_id:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        similar_retailers = ai_recommendation_service.get_similar_retailers(retailer_id, limit)
+        
+        return jsonify({
+            'retailer_id': retailer_id,
+            'similar_retailers': similar_retailers,
+            'count': len(similar_retailers)
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error getting similar retailers for {retailer_id}: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @recommendations_bp.route('/products', methods=['GET'])
 def get_products():
     """Get products with filtering and search"""
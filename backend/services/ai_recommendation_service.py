@@ -5,25 +5,83 @@ AI-powered recommendation service using machine learning algorithms
 import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 from datetime import datetime, timedelta
 import logging
 import requests
 import json
-from typing import List, Dict, Any, Optional
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Tuple
 from backend.models.mongodb_models import Product, Purchase, Retailer, Recommendation
+from backend.utils.similarity import NeighborIndex, top_k_indices
+from backend.utils.model_store import ModelStore
+from backend.utils.purchase_index import purchase_index
+from backend.utils.refresh import SingleFlight
+from backend.utils.trending import trending_products
+from backend.utils.leaderboard import popularity_leaderboard
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+class ContentModels:
+    """Trained content models published as a unit by AIRecommendationService"""
+    
+    def __init__(self, version: str, tfidf_vectorizer: TfidfVectorizer, neighbor_index: NeighborIndex,
+                 product_ids: List[str], kmeans_model: Optional[MiniBatchKMeans] = None,
+                 product_clusters: Optional[Dict[str, int]] = None):
+        self.version = version
+        self.tfidf_vectorizer = tfidf_vectorizer
+        self.neighbor_index = neighbor_index
+        self.product_ids = product_ids
+        self.product_rows = {product_id: row for row, product_id in enumerate(product_ids)}
+        self.kmeans_model = kmeans_model
+        
+        # Product id -> cluster, and cluster -> product ids for candidate filtering
+        self.product_clusters = dict(product_clusters or {})
+        self.cluster_members = {}
+        for product_id, cluster in self.product_clusters.items():
+            self.cluster_members.setdefault(cluster, []).append(product_id)
+    
+    def with_assignments(self, version: str, kmeans_model: MiniBatchKMeans,
+                         assignments: Dict[str, int]) -> 'ContentModels':
+        """Copy with products (re)assigned to clusters; the vectorizer and neighbour index are shared"""
+        return ContentModels(
+            version, self.tfidf_vectorizer, self.neighbor_index, self.product_ids,
+            kmeans_model, {**self.product_clusters, **assignments}
+        )
+
 class AIRecommendationService:
     """Advanced AI recommendation system with multiple algorithms"""
     
+    ARTIFACT_NAME = 'ai_recommendation_service'
+    
+    # Product fields returned with each recommendation
+    PRODUCT_FIELDS = ('name', 'price', 'rating')
+    
+    # Product fields used to build TF-IDF text
+    TEXT_FIELDS = ('name', 'description', 'category', 'tags')
+    
     def __init__(self):
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-        self.kmeans_model = None
-        self.product_features = None
-        self.similarity_matrix = None
+        # Requests read the current models; training and refits swap in new ones
+        self.models = None
+        self._publish_lock = threading.Lock()
+        self.model_store = ModelStore(Config.MODEL_ARTIFACT_DIR, Config.MODEL_ARTIFACT_VERSIONS)
+        self.purchase_index = purchase_index
+        self.trending = trending_products
+        self._initializations = SingleFlight('ai-models')
+        
+        # Personalized recommendation sources run concurrently on this pool
+        self._source_executor = ThreadPoolExecutor(
+            max_workers=Config.PERSONALIZED_WORKERS, thread_name_prefix='personalized-sources'
+        )
+    
+    @property
+    def models_version(self) -> Optional[str]:
+        models = self.models
+        return models.version if models is not None else None
         
     def initialize_models(self):
         """Initialize and train ML models with current data"""
@@ -36,10 +94,9 @@ class AIRecommendationService:
             # Create feature matrix
             product_data = []
             for product in products:
-                features = f"{product.name} {product.description} {product.category} {' '.join(product.tags or [])}"
                 product_data.append({
                     'id': str(product.id),
-                    'features': features,
+                    'features': self._product_text(product),
                     'price': product.price,
                     'rating': product.rating or 0,
                     'category': product.category
@@ -48,14 +105,36 @@ class AIRecommendationService:
             df = pd.DataFrame(product_data)
             
             # TF-IDF vectorization
-            tfidf_matrix = self.tfidf_vectorizer.fit_transform(df['features'])
-            self.similarity_matrix = cosine_similarity(tfidf_matrix)
+            tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+            tfidf_matrix = tfidf_vectorizer.fit_transform(df['features'])
+            neighbor_index = NeighborIndex.build(
+                tfidf_matrix,
+                k=Config.SIMILARITY_TOP_K,
+                chunk_size=Config.SIMILARITY_CHUNK_SIZE,
+                ann_min_items=Config.ANN_MIN_ITEMS,
+                ann_lists=Config.ANN_LISTS or None,
+                ann_probes=Config.ANN_PROBES
+            )
             
-            # K-means clustering for product grouping
-            self.kmeans_model = KMeans(n_clusters=min(10, len(products)//5 + 1), random_state=42)
-            self.kmeans_model.fit(tfidf_matrix.toarray())
+            # Mini-batch k-means directly on the sparse TF-IDF matrix for product grouping
+            kmeans_model = MiniBatchKMeans(
+                n_clusters=min(Config.PRODUCT_CLUSTERS, len(df) // 5 + 1),
+                batch_size=Config.CLUSTER_BATCH_SIZE,
+                n_init=3,
+                random_state=42
+            )
+            clusters = kmeans_model.fit_predict(tfidf_matrix)
             
-            self.product_features = df
+            # Later refits must not reassign centroids under existing assignments
+            kmeans_model.set_params(reassignment_ratio=0)
+            
+            models = ContentModels(
+                self._new_version(), tfidf_vectorizer, neighbor_index, df['id'].tolist(),
+                kmeans_model, dict(zip(df['id'], clusters.astype(int).tolist()))
+            )
+            with self._publish_lock:
+                self.save_models(models)
+                self.models = models
             logger.info("AI models initialized successfully")
             return True
             
@@ -63,31 +142,173 @@ class AIRecommendationService:
             logger.error(f"Model initialization failed: {e}")
             return False
     
+    def assign_products(self, products) -> Dict[str, int]:
+        """
+        Fold new or changed products into the existing clusters
+        
+        Centroids are nudged with one mini-batch update, so the catalog can
+        grow without retraining the TF-IDF model or the neighbour index.
+        The refit runs on a copy that is persisted and then published.
+        
+        Args:
+            products: Product documents to assign
+            
+        Returns:
+            Product id -> cluster for the given products
+        """
+        try:
+            products = list(products)
+            
+            with self._publish_lock:
+                models = self.models
+                if not products or models is None or models.kmeans_model is None:
+                    return {}
+                
+                features = models.tfidf_vectorizer.transform([self._product_text(product) for product in products])
+                kmeans_model = copy.deepcopy(models.kmeans_model)
+                kmeans_model.partial_fit(features)
+                labels = kmeans_model.predict(features)
+                
+                assignments = {str(product.id): int(label) for product, label in zip(products, labels)}
+                updated = models.with_assignments(self._new_version(), kmeans_model, assignments)
+                self.save_models(updated)
+                self.models = updated
+            
+            return assignments
+            
+        except Exception as e:
+            logger.error(f"Product cluster assignment failed: {e}")
+            return {}
+    
+    def start_background_initialization(self) -> bool:
+        """
+        Retrain every model in a background thread
+        
+        Used after the catalog is replaced: product ids change, so cluster
+        assignments and the neighbour index cannot be patched in place.
+        
+        Returns:
+            False if a retrain is already in flight
+        """
+        return self._initializations.start(self.initialize_models, lambda: True)
+    
+    @staticmethod
+    def _product_text(product) -> str:
+        return f"{product.name} {product.description} {product.category} {' '.join(product.tags or [])}"
+    
+    @staticmethod
+    def _new_version() -> str:
+        return datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    
+    def ensure_models(self) -> bool:
+        """Make models available, preferring persisted artifacts over retraining"""
+        if self.models is not None:
+            return True
+        return self.load_models() or self.initialize_models()
+    
+    def save_models(self, models: ContentModels):
+        """Persist the neighbour table, product ids, vocabulary and clusters as versioned artifacts"""
+        try:
+            arrays = {
+                'neighbors': models.neighbor_index.neighbors,
+                'neighbor_scores': models.neighbor_index.scores,
+                'idf': models.tfidf_vectorizer.idf_
+            }
+            metadata = {
+                'product_ids': models.product_ids,
+                'vocabulary': {term: int(i) for term, i in models.tfidf_vectorizer.vocabulary_.items()}
+            }
+            if models.kmeans_model is not None:
+                # Clusters cover products assigned after training as well as the indexed ones
+                cluster_product_ids = list(models.product_clusters)
+                arrays['cluster_centers'] = models.kmeans_model.cluster_centers_
+                arrays['clusters'] = np.array(
+                    [models.product_clusters[product_id] for product_id in cluster_product_ids], dtype=np.int32
+                )
+                metadata['cluster_product_ids'] = cluster_product_ids
+            self.model_store.save(self.ARTIFACT_NAME, models.version, arrays, metadata)
+            
+        except Exception as e:
+            logger.error(f"Failed to save AI models: {e}")
+    
+    def load_models(self) -> bool:
+        """Load the latest persisted models with memory-mapped arrays"""
+        try:
+            loaded = self.model_store.load(self.ARTIFACT_NAME)
+            if loaded is None:
+                return False
+            
+            arrays, metadata = loaded
+            tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+            tfidf_vectorizer.vocabulary_ = metadata['vocabulary']
+            tfidf_vectorizer.idf_ = np.asarray(arrays['idf'])
+            
+            # Refits continue from the persisted centroids, each weighted by its
+            # cluster size so new products only nudge them
+            kmeans_model = None
+            product_clusters = {}
+            if 'cluster_centers' in arrays:
+                centers = np.asarray(arrays['cluster_centers'])
+                clusters = np.asarray(arrays['clusters'])
+                sizes = np.bincount(clusters[clusters >= 0], minlength=len(centers))
+                kmeans_model = MiniBatchKMeans(
+                    n_clusters=len(centers), init=centers, n_init=1, reassignment_ratio=0,
+                    batch_size=Config.CLUSTER_BATCH_SIZE, random_state=42
+                ).fit(centers, sample_weight=np.maximum(sizes, 1))
+                product_clusters = {
+                    product_id: int(cluster)
+                    for product_id, cluster in zip(metadata.get('cluster_product_ids', metadata['product_ids']), clusters)
+                    if cluster >= 0
+                }
+            
+            models = ContentModels(
+                metadata['version'], tfidf_vectorizer, NeighborIndex(arrays['neighbors'], arrays['neighbor_scores']),
+                metadata['product_ids'], kmeans_model, product_clusters
+            )
+            with self._publish_lock:
+                self.models = models
+            logger.info(f"Loaded AI models version {metadata['version']}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to load AI models: {e}")
+            return False
+    
+    def reload_if_stale(self) -> bool:
+        """Load the persisted models if another process has saved a newer version"""
+        current_version = self.model_store.current_version(self.ARTIFACT_NAME)
+        if current_version is None or current_version == self.models_version:
+            return False
+        return self.load_models()
+    
     def get_content_based_recommendations(self, product_id: str, limit: int = 5) -> List[Dict]:
         """Get recommendations based on product content similarity"""
         try:
-            if self.similarity_matrix is None:
-                self.initialize_models()
+            if self.models is None:
+                self.ensure_models()
             
-            product_idx = self.product_features[self.product_features['id'] == product_id].index
-            if len(product_idx) == 0:
+            models = self.models
+            if models is None:
                 return []
             
-            product_idx = product_idx[0]
-            similarity_scores = list(enumerate(self.similarity_matrix[product_idx]))
-            similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
+            product_idx = models.product_rows.get(product_id)
+            if product_idx is not None:
+                # Top-k neighbours are precomputed; the index already excludes the product itself
+                neighbor_rows, neighbor_scores = models.neighbor_index.similar(product_idx, limit)
+                similar = [(models.product_ids[i], float(score)) for i, score in zip(neighbor_rows, neighbor_scores)]
+            else:
+                # Products assigned after the index was built are matched within their cluster
+                similar = self._get_cluster_neighbors(models, product_id, limit)
+            
+            products = self._fetch_products([product_id_rec for product_id_rec, _ in similar])
             
             recommendations = []
-            for i, score in similarity_scores[1:limit+1]:  # Skip the product itself
-                product_id_rec = self.product_features.iloc[i]['id']
-                product = Product.objects(id=product_id_rec).first()
+            for product_id_rec, score in similar:
+                product = products.get(product_id_rec)
                 if product:
                     recommendations.append({
-                        'product_id': str(product.id),
-                        'name': product.name,
-                        'price': product.price,
-                        'rating': product.rating,
-                        'similarity_score': float(score),
+                        **product,
+                        'similarity_score': score,
                         'reason': 'Content similarity'
                     })
             
@@ -97,6 +318,51 @@ class AIRecommendationService:
             logger.error(f"Content-based recommendation failed: {e}")
             return []
     
+    def _get_cluster_neighbors(self, models: ContentModels, product_id: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Rank members of a product's cluster by TF-IDF cosine similarity
+        
+        Only up to CANDIDATES_PER_SOURCE members of the product's own cluster
+        are loaded and scored, rather than the whole catalog.
+        """
+        cluster = models.product_clusters.get(product_id)
+        if cluster is None:
+            return []
+        
+        member_ids = [
+            member_id for member_id in models.cluster_members.get(cluster, ()) if member_id != product_id
+        ][:Config.CANDIDATES_PER_SOURCE]
+        if not member_ids:
+            return []
+        
+        texts = {
+            str(product.id): self._product_text(product)
+            for product in Product.objects(pk__in=member_ids + [product_id]).only(*self.TEXT_FIELDS)
+        }
+        if product_id not in texts:
+            return []
+        
+        candidate_ids = [member_id for member_id in member_ids if member_id in texts]
+        vectors = models.tfidf_vectorizer.transform([texts[product_id]] + [texts[member_id] for member_id in candidate_ids])
+        scores = (vectors[1:] @ vectors[0].T).toarray().ravel()
+        
+        return [(candidate_ids[i], float(scores[i])) for i in top_k_indices(scores, limit) if scores[i] > 0]
+    
+    def _fetch_products(self, product_ids: List[str]) -> Dict[str, Dict]:
+        """Load recommendation fields for several products with one projected $in query"""
+        if not product_ids:
+            return {}
+        
+        return {
+            str(doc['_id']): {
+                'product_id': str(doc['_id']),
+                'name': doc.get('name'),
+                'price': doc.get('price'),
+                'rating': doc.get('rating')
+            }
+            for doc in Product.objects(pk__in=list(product_ids)).only(*self.PRODUCT_FIELDS).as_pymongo()
+        }
+    
     def get_collaborative_recommendations(self, retailer_id: str, limit: int = 5) -> List[Dict]:
         """Get recommendations based on collaborative filtering"""
         try:
@@ -108,52 +374,35 @@ class AIRecommendationService:
             # Find similar users based on purchase patterns
             user_products = set([str(p.product_id) for p in purchases])
             
-            # Get other users who bought similar products
-            similar_users = []
-            all_purchases = Purchase.objects.all()
-            
-            user_similarity = {}
-            for purchase in all_purchases:
-                other_retailer = purchase.retailer_id
-                if other_retailer != retailer_id:
-                    if other_retailer not in user_similarity:
-                        other_purchases = Purchase.objects(retailer_id=other_retailer)
-                        other_products = set([str(p.product_id) for p in other_purchases])
-                        
-                        # Calculate Jaccard similarity
-                        intersection = len(user_products.intersection(other_products))
-                        union = len(user_products.union(other_products))
-                        similarity = intersection / union if union > 0 else 0
-                        
-                        user_similarity[other_retailer] = similarity
-            
-            # Get top similar users
-            similar_users = sorted(user_similarity.items(), key=lambda x: x[1], reverse=True)[:10]
+            # Top 10 users by Jaccard similarity: MinHash LSH estimates, or exact
+            # scores over every user sharing a product
+            index = self.purchase_index.ensure_fresh()
+            if Config.RETAILER_NEIGHBOR_SEARCH == 'lsh':
+                similar_users = index.approximate_similar_retailers(str(retailer_id), user_products, limit=10)
+            else:
+                similar_users = index.similar_retailers(str(retailer_id), user_products, limit=10)
             
             # Get products bought by similar users but not by current user
             recommended_products = {}
             for similar_user_id, similarity_score in similar_users:
-                similar_purchases = Purchase.objects(retailer_id=similar_user_id)
-                for purchase in similar_purchases:
-                    product_id = str(purchase.product_id)
+                for product_id, purchase_count in index.purchase_counts(similar_user_id):
                     if product_id not in user_products:
                         if product_id not in recommended_products:
                             recommended_products[product_id] = 0
-                        recommended_products[product_id] += similarity_score
+                        recommended_products[product_id] += similarity_score * purchase_count
             
             # Sort and get top recommendations
             sorted_recommendations = sorted(recommended_products.items(), 
                                           key=lambda x: x[1], reverse=True)[:limit]
             
+            products = self._fetch_products([product_id for product_id, _ in sorted_recommendations])
+            
             recommendations = []
             for product_id, score in sorted_recommendations:
-                product = Product.objects(id=product_id).first()
+                product = products.get(product_id)
                 if product:
                     recommendations.append({
-                        'product_id': product_id,
-                        'name': product.name,
-                        'price': product.price,
-                        'rating': product.rating,
+                        **product,
                         'collaborative_score': float(score),
                         'reason': 'Users with similar preferences also bought this'
                     })
@@ -164,6 +413,26 @@ class AIRecommendationService:
             logger.error(f"Collaborative filtering failed: {e}")
             return self.get_popular_recommendations(limit)
     
+    def get_similar_retailers(self, retailer_id: str, limit: int = 10) -> List[Dict]:
+        """Get the retailers whose purchase histories are most similar (approximate Jaccard)"""
+        try:
+            neighbors = self.purchase_index.ensure_fresh().similar_to_retailer(str(retailer_id), limit)
+            return [
+                {'retailer_id': other_id, 'similarity': similarity}
+                for other_id, similarity in neighbors
+            ]
+            
+        except Exception as e:
+            logger.error(f"Similar retailer lookup failed: {e}")
+            return []
+    
+    def record_purchase(self, purchase: Purchase):
+        """Add a newly recorded purchase to the co-purchase index, MinHash signatures and trending counters"""
+        if self.purchase_index.built_at is not None:
+            self.purchase_index.add(str(purchase.retailer_id), str(purchase.product_id))
+        if self.trending.seeded_at is not None:
+            self.trending.record(str(purchase.product_id), purchase.purchase_date)
+    
     def get_location_based_recommendations(self, latitude: float, longitude: float, 
                                          radius_km: float = 10, limit: int = 5) -> List[Dict]:
         """Get recommendations based on location and local trends"""
@@ -187,15 +456,14 @@ class AIRecommendationService:
             sorted_products = sorted(location_products.items(), 
                                    key=lambda x: x[1], reverse=True)[:limit]
             
+            products = self._fetch_products([product_id for product_id, _ in sorted_products])
+            
             recommendations = []
             for product_id, popularity in sorted_products:
-                product = Product.objects(id=product_id).first()
+                product = products.get(product_id)
                 if product:
                     recommendations.append({
-                        'product_id': product_id,
-                        'name': product.name,
-                        'price': product.price,
-                        'rating': product.rating,
+                        **product,
                         'local_popularity': popularity,
                         'reason': f'Popular in your area ({radius_km}km radius)'
                     })
@@ -209,43 +477,19 @@ class AIRecommendationService:
     def get_trending_recommendations(self, limit: int = 5) -> List[Dict]:
         """Get trending products based on recent activity"""
         try:
-            # Get products with high recent activity
-            recent_date = datetime.now() - timedelta(days=7)
-            recent_purchases = Purchase.objects(purchase_date__gte=recent_date)
-            
-            product_trends = {}
-            for purchase in recent_purchases:
-                product_id = str(purchase.product_id)
-                if product_id not in product_trends:
-                    product_trends[product_id] = {'count': 0, 'total_rating': 0, 'ratings': 0}
-                
-                product_trends[product_id]['count'] += 1
-                if purchase.rating:
-                    product_trends[product_id]['total_rating'] += purchase.rating
-                    product_trends[product_id]['ratings'] += 1
-            
-            # Calculate trend score (purchases + average rating)
-            for product_id in product_trends:
-                trend_data = product_trends[product_id]
-                avg_rating = (trend_data['total_rating'] / trend_data['ratings'] 
-                            if trend_data['ratings'] > 0 else 0)
-                trend_data['trend_score'] = trend_data['count'] * 0.7 + avg_rating * 0.3
-            
-            # Sort by trend score
-            sorted_trends = sorted(product_trends.items(), 
-                                 key=lambda x: x[1]['trend_score'], reverse=True)[:limit]
+            # Trend score: decayed purchase count (purchases carry no rating, so the
+            # product's own rating is used) from the incrementally maintained counters
+            sorted_trends = self.trending.ensure_fresh().top(limit)
+            products = self._fetch_products([product_id for product_id, _, _ in sorted_trends])
             
             recommendations = []
-            for product_id, trend_data in sorted_trends:
-                product = Product.objects(id=product_id).first()
+            for product_id, trend_score, recent_purchases in sorted_trends:
+                product = products.get(product_id)
                 if product:
                     recommendations.append({
-                        'product_id': product_id,
-                        'name': product.name,
-                        'price': product.price,
-                        'rating': product.rating,
-                        'trend_score': trend_data['trend_score'],
-                        'recent_purchases': trend_data['count'],
+                        **product,
+                        'trend_score': trend_score,
+                        'recent_purchases': round(recent_purchases, 2),
                         'reason': 'Trending this week'
                     })
             
@@ -258,17 +502,17 @@ class AIRecommendationService:
     def get_popular_recommendations(self, limit: int = 5) -> List[Dict]:
         """Get popular products as fallback recommendations"""
         try:
-            # Get products sorted by rating and purchase count
-            products = Product.objects.all().order_by('-rating', '-purchase_count')[:limit]
+            # Products ranked by recent purchase count from the precomputed leaderboard
+            products = popularity_leaderboard.ensure_fresh().top(limit)
             
             recommendations = []
             for product in products:
                 recommendations.append({
-                    'product_id': str(product.id),
-                    'name': product.name,
-                    'price': product.price,
-                    'rating': product.rating,
-                    'purchase_count': product.purchase_count or 0,
+                    'product_id': product['product_id'],
+                    'name': product['name'],
+                    'price': product['price'],
+                    'rating': product['rating'],
+                    'purchase_count': product['purchase_count'],
                     'reason': 'Popular choice'
                 })
             
@@ -280,19 +524,28 @@ class AIRecommendationService:
     
     def get_personalized_recommendations(self, retailer_id: str, latitude: float = None, 
                                        longitude: float = None, limit: int = 10) -> Dict[str, Any]:
-        """Get comprehensive personalized recommendations using multiple algorithms"""
+        """
+        Get comprehensive personalized recommendations using multiple algorithms
+        
+        Sources run concurrently; any source still running after
+        PERSONALIZED_SOURCE_TIMEOUT seconds is dropped from the response
+        rather than failing it. Per-source timings are returned in
+        ``timings_ms``.
+        """
         try:
-            recommendations = {
-                'collaborative': self.get_collaborative_recommendations(retailer_id, limit//2),
-                'trending': self.get_trending_recommendations(limit//4),
-                'popular': self.get_popular_recommendations(limit//4)
+            sources = {
+                'collaborative': lambda: self.get_collaborative_recommendations(retailer_id, limit//2),
+                'trending': lambda: self.get_trending_recommendations(limit//4),
+                'popular': lambda: self.get_popular_recommendations(limit//4)
             }
             
             if latitude and longitude:
-                recommendations['location_based'] = self.get_location_based_recommendations(
+                sources['location_based'] = lambda: self.get_location_based_recommendations(
                     latitude, longitude, limit=limit//4
                 )
             
+            recommendations, timings, dropped = self._run_sources(sources, Config.PERSONALIZED_SOURCE_TIMEOUT)
+            
             # Combine and deduplicate recommendations
             all_recommendations = []
             seen_products = set()
@@ -308,6 +561,8 @@ class AIRecommendationService:
                 'recommendations': all_recommendations[:limit],
                 'total_count': len(all_recommendations),
                 'categories': list(recommendations.keys()),
+                'timings_ms': timings,
+                'dropped_sources': dropped,
                 'generated_at': datetime.now().isoformat()
             }
             
@@ -321,6 +576,51 @@ class AIRecommendationService:
                 'error': str(e)
             }
     
+    def _run_sources(self, sources: Dict, timeout: float):
+        """
+        Run recommendation sources concurrently under a shared deadline
+        
+        Args:
+            sources: Source name -> zero-argument callable, in response order
+            timeout: Seconds to wait for every source
+            
+        Returns:
+            (results in source order, per-source milliseconds, names of dropped sources)
+        """
+        started = time.perf_counter()
+        timings = {}
+        
+        def timed(name, source):
+            def run():
+                try:
+                    return source()
+                finally:
+                    timings[name] = round((time.perf_counter() - started) * 1000, 2)
+            return run
+        
+        futures = {name: self._source_executor.submit(timed(name, source)) for name, source in sources.items()}
+        wait(futures.values(), timeout=timeout)
+        
+        results = {}
+        dropped = []
+        for name, future in futures.items():
+            if future.done():
+                try:
+                    results[name] = future.result()
+                    continue
+                except Exception as e:
+                    logger.error(f"Recommendation source {name} failed: {e}")
+            else:
+                # A running source finishes in the background; its result is discarded
+                future.cancel()
+                logger.warning(f"Recommendation source {name} missed the {timeout}s deadline")
+            dropped.append(name)
+        
+        for name in dropped:
+            timings.setdefault(name, round((time.perf_counter() - started) * 1000, 2))
+        
+        return results, {name: timings[name] for name in sources}, dropped
+    
     def save_recommendation(self, retailer_id: str, recommendations: List[Dict], 
                           recommendation_type: str = 'personalized'):
         """Save recommendations to database for tracking"""
@@ -382,26 +382,44 @@ class ProductDataService:
             }
         ]
     
-    def populate_database(self) -> Dict[str, Any]:
-        """Populate database with comprehensive product catalog"""
+    def populate_database(self, replace: bool = True) -> Dict[str, Any]:
+        """
+        Populate database with comprehensive product catalog
+        
+        Args:
+            replace: Drop the existing catalog first; otherwise products are
+                upserted by SKU and keep their ids
+        """
         try:
-            # First, clear existing products to avoid conflicts
-            Product.drop_collection()
+            if replace:
+                # Clear existing products to avoid conflicts
+                Product.drop_collection()
             
             created_count = 0
             updated_count = 0
+            product_ids = []
             
             for i, product_data in enumerate(self.product_data):
                 # Generate unique SKU if not present
                 if 'sku' not in product_data or not product_data['sku']:
                     product_data['sku'] = f"SKU-{i+1:04d}"
                 
-                # Create new product
-                product = Product(**product_data)
-                product.created_at = datetime.now()
-                product.updated_at = datetime.now()
-                product.save()
-                created_count += 1
+                product = None if replace else Product.objects(sku=product_data['sku']).first()
+                if product:
+                    # Update existing product in place
+                    for field, value in product_data.items():
+                        setattr(product, field, value)
+                    product.updated_at = datetime.now()
+                    product.save()
+                    updated_count += 1
+                else:
+                    # Create new product
+                    product = Product(**product_data)
+                    product.created_at = datetime.now()
+                    product.updated_at = datetime.now()
+                    product.save()
+                    created_count += 1
+                product_ids.append(str(product.product_id))
             
             # Create/update categories
             categories = list(set([p['category'] for p in self.product_data]))
@@ -425,6 +443,8 @@ class ProductDataService:
                 'products_updated': updated_count,
                 'categories_created': category_count,
                 'total_products': len(self.product_data),
+                'catalog_replaced': replace,
+                'product_ids': product_ids,
                 'message': f'Successfully populated database with {len(self.product_data)} products'
             }
             
@@ -0,0 +1,91 @@
+"""
+In-process caching utilities for the Retailer Recommendation System
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL and group invalidation"""
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        
+        # key -> (expires_at, group, value), least recently used first
+        self._entries = OrderedDict()
+        self._groups = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, group: Optional[Hashable] = None):
+        """
+        Store a value, evicting the least recently used entries when full
+        
+        Args:
+            key: Cache key
+            value: Value to store
+            group: Optional tag so related entries can be dropped together
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, group, value)
+            if group is not None:
+                self._groups.setdefault(group, set()).add(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate_group(self, group: Hashable) -> int:
+        """Drop every entry stored under a group; returns the number removed"""
+        with self._lock:
+            keys = self._groups.pop(group, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            return len(keys)
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+    
+    def _remove(self, key: Hashable):
+        _, group, _ = self._entries.pop(key)
+        if group is not None:
+            keys = self._groups.get(group)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._groups[group]
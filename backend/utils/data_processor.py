@@ -3,18 +3,100 @@ Data processing utilities for the Retailer Recommendation System
 """
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import logging
 from backend.models.mongodb_models import Retailer, Product, Purchase
+from backend.utils.purchase_index import purchase_index
 
 logger = logging.getLogger(__name__)
 
+class PurchaseMatrix:
+    """Sparse retailer x product interaction matrix with stable integer id maps"""
+    
+    def __init__(self, matrix: sparse.csr_matrix, retailer_ids: np.ndarray, product_ids: np.ndarray):
+        self.matrix = matrix
+        self.retailer_ids = retailer_ids
+        self.product_ids = product_ids
+        self.retailer_index = {retailer_id: i for i, retailer_id in enumerate(retailer_ids)}
+        self.product_index = {product_id: i for i, product_id in enumerate(product_ids)}
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.matrix.shape
+    
+    @property
+    def empty(self) -> bool:
+        return self.matrix.nnz == 0
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, value_column: str = 'rating') -> 'PurchaseMatrix':
+        """
+        Build the matrix from a frame of (retailer_id, product_id, value) rows
+        
+        Ids are sorted before coding so the same data always yields the same
+        row/column layout. Repeated (retailer, product) pairs are averaged,
+        matching the previous pivot_table behaviour.
+        
+        Args:
+            df: DataFrame with retailer_id, product_id and value_column columns
+            value_column: Column holding the interaction strength
+            
+        Returns:
+            PurchaseMatrix backed by a float32 CSR matrix
+        """
+        if df.empty:
+            return cls.empty_matrix()
+        
+        retailer_ids, rows = np.unique(df['retailer_id'].to_numpy(dtype=str), return_inverse=True)
+        product_ids, cols = np.unique(df['product_id'].to_numpy(dtype=str), return_inverse=True)
+        
+        return cls.from_codes(
+            rows, cols, df[value_column].to_numpy(),
+            retailer_ids.astype(object), product_ids.astype(object)
+        )
+    
+    @classmethod
+    def from_codes(cls, rows: np.ndarray, cols: np.ndarray, values: np.ndarray,
+                   retailer_ids: np.ndarray, product_ids: np.ndarray) -> 'PurchaseMatrix':
+        """
+        Build the matrix from integer-coded interactions
+        
+        Args:
+            rows: Row code of each interaction (index into retailer_ids)
+            cols: Column code of each interaction (index into product_ids)
+            values: Interaction strength; repeated (row, col) pairs are averaged
+            retailer_ids: Retailer id of each row
+            product_ids: Product id of each column
+            
+        Returns:
+            PurchaseMatrix backed by a float32 CSR matrix
+        """
+        values = np.asarray(values, dtype=np.float64)
+        shape = (len(retailer_ids), len(product_ids))
+        
+        # Both matrices share the same coordinates, so their canonical CSR
+        # data arrays line up element for element after duplicates are summed
+        sums = sparse.csr_matrix((values, (rows, cols)), shape=shape)
+        counts = sparse.csr_matrix((np.ones_like(values), (rows, cols)), shape=shape)
+        sums.data /= counts.data
+        
+        return cls(sums.astype(np.float32), retailer_ids, product_ids)
+    
+    @classmethod
+    def empty_matrix(cls) -> 'PurchaseMatrix':
+        return cls(
+            sparse.csr_matrix((0, 0), dtype=np.float32),
+            np.array([], dtype=object),
+            np.array([], dtype=object)
+        )
+
 class DataProcessor:
     """Utility class for data processing and analysis"""
     
     @staticmethod
-    def get_retailer_purchase_matrix(days: int = 180) -> pd.DataFrame:
+    def get_retailer_purchase_matrix(days: int = 180) -> PurchaseMatrix:
         """
         Create a retailer-product purchase matrix
         
@@ -22,23 +104,19 @@ class DataProcessor:
             days: Number of days to look back for purchases
             
         Returns:
-            DataFrame with retailers as rows and products as columns
+            PurchaseMatrix with retailers as rows and products as columns
         """
         try:
             # Get purchases from specified time period
             start_date = datetime.utcnow() - timedelta(days=days)
             
-            purchases = db.session.query(
-                Purchase.retailer_id,
-                Purchase.product_id,
-                Purchase.quantity,
-                Purchase.total_amount
-            ).filter(
-                Purchase.purchase_date >= start_date
-            ).all()
+            purchases = Purchase.objects(
+                purchase_date__gte=start_date
+            ).values_list('retailer_id', 'product_id', 'quantity', 'total_amount')
+            purchases = list(purchases)
             
             if not purchases:
-                return pd.DataFrame()
+                return PurchaseMatrix.empty_matrix()
             
             # Create DataFrame
             df = pd.DataFrame(purchases, columns=[
@@ -48,6 +126,7 @@ class DataProcessor:
             # Convert to strings for consistency
             df['retailer_id'] = df['retailer_id'].astype(str)
             df['product_id'] = df['product_id'].astype(str)
+            df['total_amount'] = df['total_amount'].astype(float)
             
             # Aggregate multiple purchases of same product by same retailer
             df_agg = df.groupby(['retailer_id', 'product_id']).agg({
@@ -59,19 +138,11 @@ class DataProcessor:
             df_agg['rating'] = np.log1p(df_agg['quantity']) + np.log1p(df_agg['total_amount']) / 10
             df_agg['rating'] = np.clip(df_agg['rating'], 1, 5)
             
-            # Pivot to create matrix
-            matrix = df_agg.pivot_table(
-                index='retailer_id',
-                columns='product_id',
-                values='rating',
-                fill_value=0
-            )
-            
-            return matrix
+            return PurchaseMatrix.from_frame(df_agg)
             
         except Exception as e:
             logger.error(f"Error creating purchase matrix: {e}")
-            return pd.DataFrame()
+            return PurchaseMatrix.empty_matrix()
     
     @staticmethod
     def get_product_features() -> pd.DataFrame:
@@ -132,26 +203,11 @@ class DataProcessor:
             retailer2_id: Second retailer ID
             
         Returns:
-            Similarity score between 0 and 1
+            Similarity score between 0 and 1 (estimated from MinHash signatures)
         """
         try:
-            # Get purchase history for both retailers
-            purchases1 = set(db.session.query(Purchase.product_id).filter(
-                Purchase.retailer_id == retailer1_id
-            ).all())
-            
-            purchases2 = set(db.session.query(Purchase.product_id).filter(
-                Purchase.retailer_id == retailer2_id
-            ).all())
-            
-            if not purchases1 or not purchases2:
-                return 0.0
-            
-            # Calculate Jaccard similarity
-            intersection = len(purchases1.intersection(purchases2))
-            union = len(purchases1.union(purchases2))
-            
-            return intersection / union if union > 0 else 0.0
+            # MinHash estimate of the Jaccard similarity of the purchased product sets
+            return purchase_index.ensure_fresh().retailer_similarity(str(retailer1_id), str(retailer2_id))
             
         except Exception as e:
             logger.error(f"Error calculating retailer similarity: {e}")
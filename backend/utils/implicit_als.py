@@ -0,0 +1,156 @@
+"""
+Implicit-feedback alternating least squares for the Retailer Recommendation System
+"""
+
+import os
+import numpy as np
+from scipy import sparse
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ImplicitALS:
+    """Confidence-weighted ALS (Hu, Koren & Volinsky) solved with batched conjugate gradient"""
+    
+    def __init__(self, factors: int = 50, regularization: float = 0.1, alpha: float = 10.0,
+                 iterations: int = 15, cg_steps: int = 3, num_threads: int = 0,
+                 block_size: int = 1024, random_state: int = 42):
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        self.cg_steps = cg_steps
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.block_size = block_size
+        self.random_state = random_state
+        
+        self.user_factors = None
+        self.item_factors = None
+        self._item_gram = None
+    
+    def fit(self, matrix: sparse.csr_matrix) -> 'ImplicitALS':
+        """
+        Factorise a retailer x product matrix of implicit interaction strengths
+        
+        Observed cells are treated as preference 1 with confidence
+        ``1 + alpha * value``; unobserved cells as preference 0 with
+        confidence 1, so missing purchases are weak negatives rather than
+        explicit zero ratings.
+        
+        Args:
+            matrix: CSR matrix of non-negative interaction strengths
+        
+        Returns:
+            self, with user_factors and item_factors set (float32)
+        """
+        user_items = sparse.csr_matrix(matrix, dtype=np.float32)
+        item_users = user_items.T.tocsr()
+        
+        rng = np.random.default_rng(self.random_state)
+        scale = 0.01
+        user_factors = (rng.standard_normal((user_items.shape[0], self.factors)) * scale).astype(np.float32)
+        item_factors = (rng.standard_normal((user_items.shape[1], self.factors)) * scale).astype(np.float32)
+        
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            for _ in range(self.iterations):
+                self._solve(user_items, user_factors, item_factors, executor)
+                self._solve(item_users, item_factors, user_factors, executor)
+        
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self._item_gram = None
+        return self
+    
+    def fold_in(self, cols: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Solve exactly for one retailer's factors given fixed item factors
+        
+        Args:
+            cols: Item columns the retailer interacted with
+            values: Interaction strength for each column
+        
+        Returns:
+            float32 factor vector
+        """
+        if self._item_gram is None:
+            self._item_gram = self._gram(self.item_factors)
+        
+        item_factors = np.asarray(self.item_factors[cols], dtype=np.float64)
+        confidence = 1.0 + self.alpha * np.asarray(values, dtype=np.float64)
+        
+        a = self._item_gram + (item_factors.T * (confidence - 1.0)) @ item_factors
+        b = confidence @ item_factors
+        return np.linalg.solve(a, b).astype(np.float32)
+    
+    def _gram(self, factors: np.ndarray) -> np.ndarray:
+        factors = np.asarray(factors, dtype=np.float64)
+        return factors.T @ factors + self.regularization * np.eye(self.factors)
+    
+    def _solve(self, interactions: sparse.csr_matrix, factors: np.ndarray,
+               other_factors: np.ndarray, executor: ThreadPoolExecutor):
+        """Update ``factors`` in place, one block of rows per thread pool task"""
+        gram = self._gram(other_factors).astype(np.float32)
+        blocks = [
+            (start, min(start + self.block_size, interactions.shape[0]))
+            for start in range(0, interactions.shape[0], self.block_size)
+        ]
+        futures = [
+            executor.submit(self._solve_block, interactions, factors, other_factors, gram, start, stop)
+            for start, stop in blocks
+        ]
+        for future in futures:
+            future.result()
+    
+    def _solve_block(self, interactions: sparse.csr_matrix, factors: np.ndarray,
+                     other_factors: np.ndarray, gram: np.ndarray, start: int, stop: int):
+        """
+        Run ``cg_steps`` of conjugate gradient for rows start..stop at once
+        
+        Each row solves (G + Y^T (C_u - I) Y) x_u = Y^T C_u p_u, warm-started
+        from its current factors. The sparse term is applied to the whole
+        block with one gather and one sparse-dense product.
+        """
+        block = interactions[start:stop]
+        if block.nnz == 0:
+            factors[start:stop] = 0
+            return
+        
+        nz_rows = np.repeat(np.arange(stop - start), np.diff(block.indptr))
+        nz_factors = other_factors[block.indices]
+        extra_confidence = self.alpha * block.data
+        
+        def apply(vectors: np.ndarray) -> np.ndarray:
+            weights = extra_confidence * np.einsum('ij,ij->i', nz_factors, vectors[nz_rows])
+            weighted = sparse.csr_matrix((weights, block.indices, block.indptr), shape=block.shape)
+            return vectors @ gram + weighted @ other_factors
+        
+        # Y^T C_u p_u: p is 1 on observed cells, so only those contribute
+        confidence = sparse.csr_matrix((1.0 + extra_confidence, block.indices, block.indptr), shape=block.shape)
+        b = confidence @ other_factors
+        
+        x = factors[start:stop].copy()
+        residual = b - apply(x)
+        direction = residual.copy()
+        rs_old = np.einsum('ij,ij->i', residual, residual)
+        
+        for _ in range(self.cg_steps):
+            active = rs_old > 1e-20
+            if not active.any():
+                break
+            
+            a_direction = apply(direction)
+            denominator = np.einsum('ij,ij->i', direction, a_direction)
+            step = np.where(active, rs_old / np.where(active, denominator, 1.0), 0.0).astype(np.float32)
+            
+            x += step[:, None] * direction
+            residual -= step[:, None] * a_direction
+            rs_new = np.einsum('ij,ij->i', residual, residual)
+            
+            beta = np.where(active, rs_new / np.where(active, rs_old, 1.0), 0.0).astype(np.float32)
+            direction = residual + beta[:, None] * direction
+            rs_old = rs_new
+        
+        # Rows without interactions have an all-zero right-hand side
+        x[np.diff(block.indptr) == 0] = 0
+        factors[start:stop] = x
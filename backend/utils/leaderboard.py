@@ -0,0 +1,213 @@
+"""
+Precomputed product popularity leaderboards for the Retailer Recommendation System
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+from backend.models.mongodb_models import Product, Purchase
+from backend.utils.model_store import ModelStore
+from backend.utils.product_summary import PRODUCT_SUMMARY_FIELDS, product_summary
+from backend.utils.refresh import SingleFlight
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class PopularityLeaderboard:
+    """
+    In-memory top products, global and per category, ranked by recent purchases
+    
+    Built boards are published to the model store, so only the process
+    holding the store's lock rebuilds them and every other worker loads
+    the published copy.
+    """
+    
+    ARTIFACT_NAME = 'popularity_leaderboard'
+    
+    def __init__(self, size: int = 100, window_days: int = 30, refresh_interval: float = 300,
+                 batch_size: int = 10000, model_store: Optional[ModelStore] = None):
+        self.size = size
+        self.window_days = window_days
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.model_store = model_store
+        
+        # Wall-clock build time, comparable across processes
+        self.built_at = None
+        self.version = None
+        
+        # (global board, category -> board), replaced as one object on refresh
+        self._boards = ([], {})
+        self._refreshes = SingleFlight('leaderboard')
+    
+    def refresh(self) -> 'PopularityLeaderboard':
+        """
+        Bring the boards up to date, rebuilding them in at most one process
+        
+        Boards published within ``refresh_interval`` are loaded from the
+        model store. Otherwise the process that claims the store's lock
+        rebuilds and publishes them while the others keep serving what they
+        have; a process with nothing to serve yet builds its own copy.
+        """
+        if self.model_store is None:
+            self._publish(self._build(), time.time())
+            return self
+        
+        self.reload()
+        if not self.is_stale():
+            return self
+        
+        handle = self._acquire_store_lock()
+        if handle is None:
+            if self.built_at is None:
+                self._publish(self._build(), time.time())
+            return self
+        
+        try:
+            # Another process may have published between the reload and the lock
+            self.reload()
+            if self.is_stale():
+                boards = self._build()
+                built_at = time.time()
+                version = self._save(boards, built_at)
+                self._publish(boards, built_at, version)
+        finally:
+            self.model_store.release_training_lock(handle)
+        return self
+    
+    def reload(self) -> bool:
+        """Load boards another process published, if newer than the ones served"""
+        if self.model_store is None:
+            return False
+        
+        try:
+            version = self.model_store.current_version(self.ARTIFACT_NAME)
+            if version is None or version == self.version:
+                return False
+            
+            loaded = self.model_store.load(self.ARTIFACT_NAME, version)
+            if loaded is None:
+                return False
+            
+            _, metadata = loaded
+            if self.built_at is not None and metadata['built_at'] <= self.built_at:
+                self.version = version
+                return False
+            
+            self._publish((metadata['global'], metadata['categories']), metadata['built_at'], version)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to load popularity leaderboards: {e}")
+            return False
+    
+    def _build(self) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+        """
+        Build every leaderboard from one purchase aggregation and one product scan
+        
+        Products rank by purchases in the last ``window_days``, then by
+        popularity score and rating, so a catalog without purchases still
+        has a usable ordering.
+        """
+        started = time.perf_counter()
+        since = datetime.utcnow() - timedelta(days=self.window_days)
+        
+        purchase_counts = {
+            str(row['_id']): int(row['purchase_count'])
+            for row in Purchase.objects(purchase_date__gte=since).aggregate([
+                {'$group': {'_id': '$product_id', 'purchase_count': {'$sum': 1}}}
+            ])
+        }
+        
+        products = []
+        cursor = Product._get_collection().find(
+            {'is_active': {'$ne': False}},
+            projection=dict.fromkeys(PRODUCT_SUMMARY_FIELDS, 1),
+            batch_size=self.batch_size
+        )
+        for doc in cursor:
+            product = product_summary(doc)
+            product['purchase_count'] = purchase_counts.get(product['product_id'], 0)
+            products.append(product)
+        
+        products.sort(
+            key=lambda product: (product['purchase_count'], product['popularity_score'], product['rating']),
+            reverse=True
+        )
+        
+        by_category = {}
+        for product in products:
+            board = by_category.setdefault(product['category'], [])
+            if len(board) < self.size:
+                board.append(product)
+        
+        logger.info(
+            f"Built popularity leaderboards ({len(by_category)} categories) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return products[:self.size], by_category
+    
+    def _publish(self, boards: Tuple[List[Dict], Dict[str, List[Dict]]], built_at: float,
+                 version: Optional[str] = None):
+        self._boards = boards
+        self.built_at = built_at
+        self.version = version
+    
+    def _save(self, boards: Tuple[List[Dict], Dict[str, List[Dict]]], built_at: float) -> Optional[str]:
+        """Publish boards to the model store; returns the version, or None if saving failed"""
+        try:
+            version = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+            global_board, by_category = boards
+            self.model_store.save(
+                self.ARTIFACT_NAME, version, {},
+                {'built_at': built_at, 'global': global_board, 'categories': by_category}
+            )
+            return version
+        except Exception as e:
+            logger.error(f"Failed to save popularity leaderboards: {e}")
+            return None
+    
+    def _acquire_store_lock(self):
+        """Claim the cross-process refresh lock; None if held elsewhere or unavailable"""
+        try:
+            return self.model_store.acquire_training_lock(self.ARTIFACT_NAME)
+        except Exception as e:
+            logger.error(f"Could not acquire leaderboard lock: {e}")
+            return None
+    
+    def is_stale(self) -> bool:
+        return self.built_at is None or time.time() - self.built_at > self.refresh_interval
+    
+    def ensure_fresh(self, wait: bool = False) -> 'PopularityLeaderboard':
+        """
+        Refresh if never built or older than ``refresh_interval`` seconds
+        
+        See ``SingleFlight.ensure`` for when callers wait for the refresh.
+        """
+        self._refreshes.ensure(self.refresh, self.is_stale, self.built_at is not None, wait)
+        return self
+    
+    def top(self, k: int, category: Optional[str] = None) -> List[Dict]:
+        """
+        Most popular products, read from the precomputed boards in O(k)
+        
+        Args:
+            k: Number of products (at most ``size``)
+            category: Category board to read; None for the global board
+        
+        Returns:
+            Product summaries with purchase_count, most popular first
+        """
+        global_board, by_category = self._boards
+        board = global_board if category is None else by_category.get(category, [])
+        return [dict(product) for product in board[:k]]
+
+# Global instance
+popularity_leaderboard = PopularityLeaderboard(
+    size=Config.LEADERBOARD_SIZE,
+    window_days=Config.LEADERBOARD_WINDOW_DAYS,
+    refresh_interval=Config.LEADERBOARD_REFRESH_INTERVAL,
+    batch_size=Config.TRAINING_LOAD_BATCH_SIZE,
+    model_store=ModelStore(Config.MODEL_ARTIFACT_DIR, Config.MODEL_ARTIFACT_VERSIONS)
+)
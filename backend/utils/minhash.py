@@ -0,0 +1,180 @@
+"""
+MinHash signatures with LSH banding for approximate Jaccard similarity
+"""
+
+import hashlib
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+class MinHashLSH:
+    """Per-item MinHash signatures over token sets, bucketed by LSH bands"""
+    
+    PRIME = (1 << 31) - 1
+    EMPTY = np.iinfo(np.uint32).max
+    
+    def __init__(self, num_perm: int = 128, bands: int = 32, random_state: int = 42, chunk_size: int = 50000):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.chunk_size = chunk_size
+        
+        # Universal hashes h(x) = (a * x + b) mod p; a * x stays below 2**63 for 32-bit x
+        rng = np.random.default_rng(random_state)
+        self._a = rng.integers(1, self.PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, self.PRIME, num_perm, dtype=np.uint64)
+        self._band_weights = rng.integers(1, np.iinfo(np.int64).max, self.rows, dtype=np.uint64)
+        
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._band_keys = np.empty((0, bands), dtype=np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def signature(self, tokens: Iterable[str]) -> np.ndarray:
+        """MinHash signature of a token set (all EMPTY for an empty set)"""
+        hashes = self._base_hashes(tokens)
+        if len(hashes) == 0:
+            return np.full(self.num_perm, self.EMPTY, dtype=np.uint32)
+        return self._permute(hashes).min(axis=0)
+    
+    def build(self, num_items: int, item_codes: np.ndarray, token_codes: np.ndarray, tokens: List[str]):
+        """
+        Replace every signature from (item, token) pairs in bulk
+        
+        Args:
+            num_items: Number of items; codes are 0..num_items-1
+            item_codes: Item code of each pair
+            token_codes: Index into ``tokens`` of each pair
+            tokens: Token vocabulary
+        """
+        base = self._base_hashes(tokens)
+        signatures = np.full((num_items, self.num_perm), self.EMPTY, dtype=np.uint32)
+        
+        order = np.argsort(item_codes, kind='stable')
+        item_codes = np.asarray(item_codes)[order]
+        token_codes = np.asarray(token_codes)[order]
+        
+        for start in range(0, len(item_codes), self.chunk_size):
+            items = item_codes[start:start + self.chunk_size]
+            hashes = self._permute(base[token_codes[start:start + self.chunk_size]])
+            
+            boundaries = np.flatnonzero(np.r_[True, items[1:] != items[:-1]])
+            unique_items = items[boundaries]
+            signatures[unique_items] = np.minimum(
+                signatures[unique_items], np.minimum.reduceat(hashes, boundaries, axis=0)
+            )
+        
+        self.signatures = signatures
+        self._size = num_items
+        self._band_keys = self._keys(signatures)
+        self._buckets = [{} for _ in range(self.bands)]
+        
+        occupied = np.flatnonzero(signatures[:, 0] != self.EMPTY)
+        for band, buckets in enumerate(self._buckets):
+            for item, key in zip(occupied.tolist(), self._band_keys[occupied, band].tolist()):
+                buckets.setdefault(key, set()).add(item)
+    
+    def add(self, item: int, tokens: Iterable[str]):
+        """Fold tokens into an item's signature, rebucketing only the bands that changed"""
+        self._ensure_capacity(item + 1)
+        
+        old = self.signatures[item]
+        new = np.minimum(old, self.signature(tokens))
+        if np.array_equal(old, new):
+            return
+        
+        was_empty = old[0] == self.EMPTY
+        new_keys = self._keys(new[None, :])[0]
+        changed = range(self.bands) if was_empty else np.flatnonzero(new_keys != self._band_keys[item]).tolist()
+        
+        for band in changed:
+            buckets = self._buckets[band]
+            if not was_empty:
+                old_key = int(self._band_keys[item, band])
+                members = buckets.get(old_key)
+                if members is not None:
+                    members.discard(item)
+                    if not members:
+                        del buckets[old_key]
+            buckets.setdefault(int(new_keys[band]), set()).add(item)
+        
+        self.signatures[item] = new
+        self._band_keys[item] = new_keys
+    
+    def query(self, signature: np.ndarray, limit: int = 10,
+              exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Approximate Jaccard neighbours of a signature
+        
+        Only items sharing at least one LSH band with the signature are
+        scored, by the fraction of agreeing MinHash values.
+        
+        Args:
+            signature: Query signature from ``signature``
+            limit: Number of neighbours to return
+            exclude: Item code to leave out (usually the query item)
+        
+        Returns:
+            (item, estimated similarity) pairs, most similar first
+        """
+        if signature[0] == self.EMPTY:
+            return []
+        
+        keys = self._keys(signature[None, :])[0].tolist()
+        candidates = set()
+        for buckets, key in zip(self._buckets, keys):
+            members = buckets.get(key)
+            if members:
+                candidates |= members
+        candidates.discard(exclude)
+        if not candidates:
+            return []
+        
+        items = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        estimates = (self.signatures[items] == signature).mean(axis=1)
+        
+        top = np.argsort(-estimates, kind='stable')[:limit]
+        return [(int(items[i]), float(estimates[i])) for i in top]
+    
+    def similarity(self, item1: int, item2: int) -> float:
+        """Estimated Jaccard similarity of two items (0 if either is unknown or empty)"""
+        if max(item1, item2) >= self._size:
+            return 0.0
+        first, second = self.signatures[item1], self.signatures[item2]
+        if first[0] == self.EMPTY or second[0] == self.EMPTY:
+            return 0.0
+        return float((first == second).mean())
+    
+    def _base_hashes(self, tokens: Iterable[str]) -> np.ndarray:
+        """Stable 32-bit hash of each token (Python's hash() is salted per process)"""
+        return np.array(
+            [int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), 'little') for token in tokens],
+            dtype=np.uint64
+        )
+    
+    def _permute(self, hashes: np.ndarray) -> np.ndarray:
+        return ((hashes[:, None] * self._a + self._b) % self.PRIME).astype(np.uint32)
+    
+    def _keys(self, signatures: np.ndarray) -> np.ndarray:
+        """One uint64 key per band (overflow wraps, which is fine for hashing)"""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (banded * self._band_weights).sum(axis=2, dtype=np.uint64)
+    
+    def _ensure_capacity(self, size: int):
+        if size <= self._size:
+            return
+        
+        if size > len(self.signatures):
+            capacity = max(size, 2 * len(self.signatures), 16)
+            signatures = np.full((capacity, self.num_perm), self.EMPTY, dtype=np.uint32)
+            signatures[:self._size] = self.signatures[:self._size]
+            band_keys = np.zeros((capacity, self.bands), dtype=np.uint64)
+            band_keys[:self._size] = self._band_keys[:self._size]
+            self.signatures, self._band_keys = signatures, band_keys
+        
+        self._size = size
@@ -0,0 +1,151 @@
+"""
+Versioned on-disk storage for trained model artifacts
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+from typing import Dict, Optional, Tuple
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single-process serving only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class ModelStore:
+    """Versioned model artifacts: <root>/<name>/<version>/*.npy + metadata.json, with a CURRENT pointer"""
+    
+    METADATA_FILE = 'metadata.json'
+    CURRENT_FILE = 'CURRENT'
+    LOCK_FILE = 'TRAINING.lock'
+    
+    def __init__(self, root: str, keep_versions: int = 3):
+        self.root = root
+        self.keep_versions = keep_versions
+    
+    def save(self, name: str, version: str, arrays: Dict[str, np.ndarray],
+             metadata: Optional[Dict] = None) -> str:
+        """
+        Write a new version and mark it as current
+        
+        The version is written to a temporary directory and renamed into
+        place, so readers never observe a partially written version.
+        
+        Args:
+            name: Model name (one directory per model)
+            version: Version identifier, unique per model
+            arrays: Arrays to store, one .npy file per key
+            metadata: JSON-serialisable metadata (id maps, vocabulary, ...)
+        
+        Returns:
+            Path of the written version directory
+        """
+        model_dir = os.path.join(self.root, name)
+        version_dir = os.path.join(model_dir, version)
+        tmp_dir = f"{version_dir}.tmp"
+        
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        
+        for key, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{key}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+        
+        metadata = dict(metadata or {})
+        metadata['version'] = version
+        with open(os.path.join(tmp_dir, self.METADATA_FILE), 'w') as f:
+            json.dump(metadata, f)
+        
+        os.replace(tmp_dir, version_dir)
+        self._write_current(model_dir, version)
+        self.prune(name)
+        
+        logger.info(f"Saved {name} artifacts version {version}")
+        return version_dir
+    
+    def load(self, name: str, version: Optional[str] = None) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+        """
+        Load a version (the current one by default) with memory-mapped arrays
+        
+        Returns:
+            (arrays, metadata) or None if nothing has been stored
+        """
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+        
+        version_dir = os.path.join(self.root, name, version)
+        if not os.path.isdir(version_dir):
+            return None
+        
+        arrays = {}
+        for filename in os.listdir(version_dir):
+            if not filename.endswith('.npy'):
+                continue
+            path = os.path.join(version_dir, filename)
+            try:
+                arrays[filename[:-4]] = np.load(path, mmap_mode='r', allow_pickle=False)
+            except ValueError:
+                # Older NumPy cannot memory-map zero-length arrays
+                arrays[filename[:-4]] = np.load(path, allow_pickle=False)
+        
+        with open(os.path.join(version_dir, self.METADATA_FILE)) as f:
+            metadata = json.load(f)
+        
+        return arrays, metadata
+    
+    def current_version(self, name: str) -> Optional[str]:
+        """Return the current version of a model, if any"""
+        try:
+            with open(os.path.join(self.root, name, self.CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+    
+    def acquire_training_lock(self, name: str):
+        """
+        Claim the right to train a model across every process sharing the store
+        
+        Returns:
+            A lock handle to pass to release_training_lock, or None if another
+            process is already training
+        """
+        model_dir = os.path.join(self.root, name)
+        os.makedirs(model_dir, exist_ok=True)
+        handle = open(os.path.join(model_dir, self.LOCK_FILE), 'w')
+        if fcntl is None:
+            return handle
+        
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return handle
+        except OSError:
+            handle.close()
+            return None
+    
+    def release_training_lock(self, handle):
+        """Release a lock returned by acquire_training_lock"""
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        handle.close()
+    
+    def prune(self, name: str):
+        """Delete all but the newest ``keep_versions`` versions"""
+        model_dir = os.path.join(self.root, name)
+        current = self.current_version(name)
+        versions = sorted(
+            entry for entry in os.listdir(model_dir)
+            if os.path.isdir(os.path.join(model_dir, entry)) and not entry.endswith('.tmp')
+        )
+        for version in versions[:-self.keep_versions]:
+            if version != current:
+                shutil.rmtree(os.path.join(model_dir, version), ignore_errors=True)
+    
+    def _write_current(self, model_dir: str, version: str):
+        tmp_path = os.path.join(model_dir, f"{self.CURRENT_FILE}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(model_dir, self.CURRENT_FILE))
@@ -0,0 +1,28 @@
+"""
+Product summaries shared by recommendation results and popularity leaderboards
+"""
+
+from typing import Dict
+
+# Product fields returned with each recommended or popular product
+PRODUCT_SUMMARY_FIELDS = (
+    'name', 'category', 'subcategory', 'brand', 'price', 'unit_type',
+    'popularity_score', 'rating', 'image_url', 'stock_quantity', 'is_active'
+)
+
+def product_summary(doc: Dict) -> Dict:
+    """
+    Build a product summary from a raw document projected on PRODUCT_SUMMARY_FIELDS
+    
+    Numeric fields may be stored as Decimal128, so they are converted through str.
+    """
+    product_id = str(doc['_id'])
+    product = {field: doc.get(field) for field in PRODUCT_SUMMARY_FIELDS}
+    product.update({
+        'id': product_id,
+        'product_id': product_id,
+        'price': float(str(doc.get('price') or 0)),
+        'popularity_score': float(str(doc.get('popularity_score') or 0)),
+        'rating': float(str(doc.get('rating') or 0))
+    })
+    return product
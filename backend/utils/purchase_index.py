@@ -0,0 +1,237 @@
+"""
+In-memory retailer/product co-purchase index for the Retailer Recommendation System
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
+import logging
+from backend.models.mongodb_models import Purchase
+from backend.utils.minhash import MinHashLSH
+from backend.utils.refresh import SingleFlight
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class PurchaseIndex:
+    """
+    Inverted product -> retailers index, per-retailer purchase counts and MinHash signatures
+    
+    Each worker process keeps its own index. Purchases recorded through
+    this worker are added immediately; purchases recorded by other
+    workers only appear after the next rebuild, so results can lag the
+    purchases collection by up to ``max_age`` seconds (plus the rebuild).
+    """
+    
+    def __init__(self, batch_size: int = 10000, max_age: float = 300,
+                 num_perm: int = 128, bands: int = 32):
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.num_perm = num_perm
+        self.bands = bands
+        self.built_at = None
+        
+        # Codes follow first appearance in collection order, which keeps
+        # tie-breaking identical to a natural-order scan of the purchases
+        self._retailer_codes: Dict[str, int] = {}
+        self._retailer_ids: List[str] = []
+        self._product_codes: Dict[str, int] = {}
+        self._product_ids: List[str] = []
+        
+        self._product_retailers: List[List[int]] = []
+        self._retailer_products: List[Dict[int, int]] = []
+        self.minhash = MinHashLSH(num_perm, bands)
+        self._lock = threading.RLock()
+        self._rebuilds = SingleFlight('purchase-index')
+    
+    def __len__(self) -> int:
+        return len(self._retailer_ids)
+    
+    def build(self) -> 'PurchaseIndex':
+        """Rebuild the index from one projected scan of the purchases collection"""
+        started = time.perf_counter()
+        cursor = Purchase._get_collection().find(
+            {}, projection={'_id': 0, 'retailer_id': 1, 'product_id': 1}, batch_size=self.batch_size
+        )
+        
+        rebuilt = PurchaseIndex(self.batch_size, self.max_age, self.num_perm, self.bands)
+        rebuilt.add_many(
+            ((str(doc['retailer_id']), str(doc['product_id'])) for doc in cursor), update_signatures=False
+        )
+        
+        # Signatures are built in bulk rather than one purchase at a time
+        retailer_codes = np.repeat(
+            np.arange(len(rebuilt._retailer_ids)), [len(counts) for counts in rebuilt._retailer_products]
+        )
+        product_codes = np.fromiter(
+            (product for counts in rebuilt._retailer_products for product in counts),
+            dtype=np.int64, count=len(retailer_codes)
+        )
+        rebuilt.minhash.build(len(rebuilt._retailer_ids), retailer_codes, product_codes, rebuilt._product_ids)
+        
+        with self._lock:
+            self._retailer_codes = rebuilt._retailer_codes
+            self._retailer_ids = rebuilt._retailer_ids
+            self._product_codes = rebuilt._product_codes
+            self._product_ids = rebuilt._product_ids
+            self._product_retailers = rebuilt._product_retailers
+            self._retailer_products = rebuilt._retailer_products
+            self.minhash = rebuilt.minhash
+            self.built_at = time.monotonic()
+        
+        logger.info(
+            f"Built purchase index for {len(self._retailer_ids)} retailers and "
+            f"{len(self._product_ids)} products in {time.perf_counter() - started:.2f}s"
+        )
+        return self
+    
+    def is_stale(self) -> bool:
+        return self.built_at is None or time.monotonic() - self.built_at > self.max_age
+    
+    def ensure_fresh(self, wait: bool = False) -> 'PurchaseIndex':
+        """
+        Rebuild if the index was never built or is older than ``max_age`` seconds
+        
+        See ``SingleFlight.ensure`` for when callers wait for the rebuild.
+        """
+        self._rebuilds.ensure(self.build, self.is_stale, self.built_at is not None, wait)
+        return self
+    
+    def add(self, retailer_id: str, product_id: str):
+        """Record one purchase in O(1)"""
+        self.add_many([(retailer_id, product_id)])
+    
+    def add_many(self, pairs: Iterable[Tuple[str, str]], update_signatures: bool = True):
+        """Record (retailer_id, product_id) purchases in collection order"""
+        with self._lock:
+            for retailer_id, product_id in pairs:
+                retailer = self._retailer_codes.get(retailer_id)
+                if retailer is None:
+                    retailer = self._retailer_codes[retailer_id] = len(self._retailer_ids)
+                    self._retailer_ids.append(retailer_id)
+                    self._retailer_products.append({})
+                
+                product = self._product_codes.get(product_id)
+                if product is None:
+                    product = self._product_codes[product_id] = len(self._product_ids)
+                    self._product_ids.append(product_id)
+                    self._product_retailers.append([])
+                
+                counts = self._retailer_products[retailer]
+                if product not in counts:
+                    counts[product] = 0
+                    self._product_retailers[product].append(retailer)
+                    if update_signatures:
+                        self.minhash.add(retailer, [product_id])
+                counts[product] += 1
+    
+    def similar_retailers(self, retailer_id: str, product_ids: Iterable[str],
+                          limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank other retailers by Jaccard similarity to a set of products
+        
+        Only retailers sharing at least one product are scored. If fewer than
+        ``limit`` overlap, the remaining slots are filled with zero-similarity
+        retailers. Scores are exact for the purchases the index holds, which
+        may miss other workers' purchases from the last ``max_age`` seconds.
+        
+        Args:
+            retailer_id: Retailer to exclude from the results
+            product_ids: The requesting retailer's products
+            limit: Number of retailers to return
+        
+        Returns:
+            (retailer_id, similarity) pairs, most similar first; ties keep
+            first-purchase order
+        """
+        product_ids = set(product_ids)
+        
+        with self._lock:
+            excluded = self._retailer_codes.get(retailer_id)
+            
+            products = set()
+            candidates = set()
+            for product_id in product_ids:
+                product = self._product_codes.get(product_id)
+                if product is not None:
+                    products.add(product)
+                    candidates.update(self._product_retailers[product])
+            candidates.discard(excluded)
+            
+            scored = []
+            for retailer in candidates:
+                other = self._retailer_products[retailer]
+                intersection = sum(1 for product in products if product in other)
+                union = len(product_ids) + len(other) - intersection
+                scored.append((retailer, intersection / union))
+            
+            scored.sort(key=lambda item: (-item[1], item[0]))
+            scored = scored[:limit]
+            
+            # Zero-overlap retailers follow in first-purchase order
+            retailer = 0
+            while len(scored) < limit and retailer < len(self._retailer_ids):
+                if retailer != excluded and retailer not in candidates:
+                    scored.append((retailer, 0.0))
+                retailer += 1
+            
+            return [(self._retailer_ids[retailer], similarity) for retailer, similarity in scored]
+    
+    def purchase_counts(self, retailer_id: str) -> List[Tuple[str, int]]:
+        """(product_id, number of purchases) for a retailer, in first-purchase order"""
+        with self._lock:
+            retailer = self._retailer_codes.get(retailer_id)
+            if retailer is None:
+                return []
+            return [
+                (self._product_ids[product], count)
+                for product, count in self._retailer_products[retailer].items()
+            ]
+    
+    def approximate_similar_retailers(self, retailer_id: str, product_ids: Iterable[str],
+                                      limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Approximate Jaccard neighbours of a product set via MinHash LSH
+        
+        Only retailers sharing an LSH band are scored, so products bought by
+        almost everyone do not pull every retailer into the candidate set.
+        
+        Args:
+            retailer_id: Retailer to exclude from the results
+            product_ids: The requesting retailer's products
+            limit: Number of retailers to return
+        
+        Returns:
+            (retailer_id, estimated similarity) pairs, most similar first
+        """
+        signature = self.minhash.signature(set(product_ids))
+        with self._lock:
+            neighbors = self.minhash.query(signature, limit, exclude=self._retailer_codes.get(retailer_id))
+            return [(self._retailer_ids[retailer], similarity) for retailer, similarity in neighbors]
+    
+    def similar_to_retailer(self, retailer_id: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Approximate Jaccard neighbours of a retailer's full purchase history"""
+        with self._lock:
+            retailer = self._retailer_codes.get(retailer_id)
+            if retailer is None:
+                return []
+            neighbors = self.minhash.query(self.minhash.signatures[retailer], limit, exclude=retailer)
+            return [(self._retailer_ids[code], similarity) for code, similarity in neighbors]
+    
+    def retailer_similarity(self, retailer1_id: str, retailer2_id: str) -> float:
+        """Estimated Jaccard similarity of two retailers' purchase histories"""
+        with self._lock:
+            first = self._retailer_codes.get(retailer1_id)
+            second = self._retailer_codes.get(retailer2_id)
+            if first is None or second is None:
+                return 0.0
+            return self.minhash.similarity(first, second)
+
+# Global instance
+purchase_index = PurchaseIndex(
+    batch_size=Config.TRAINING_LOAD_BATCH_SIZE,
+    max_age=Config.PURCHASE_INDEX_MAX_AGE,
+    num_perm=Config.MINHASH_PERMUTATIONS,
+    bands=Config.MINHASH_BANDS
+)
@@ -0,0 +1,84 @@
+"""
+Single-flight refresh coordination for in-memory indexes
+"""
+
+import threading
+from typing import Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Runs at most one refresh at a time; callers that lose the race never repeat it"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+    
+    def run(self, refresh: Callable[[], object], needed: Callable[[], bool]) -> bool:
+        """
+        Refresh in this thread, waiting for any refresh already in flight
+        
+        ``needed`` is checked again once the lock is held, so a caller that
+        waited for another thread's refresh does not run its own.
+        
+        Returns:
+            True if this call refreshed
+        """
+        with self._lock:
+            if not needed():
+                return False
+            refresh()
+            return True
+    
+    def start(self, refresh: Callable[[], object], needed: Callable[[], bool]) -> bool:
+        """
+        Refresh in a background thread unless a refresh is already in flight
+        
+        Returns:
+            True if a background refresh was started
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        
+        def run():
+            try:
+                if needed():
+                    refresh()
+            except Exception as e:
+                logger.error(f"Background {self.name} refresh failed: {e}")
+            finally:
+                self._lock.release()
+        
+        try:
+            threading.Thread(target=run, name=f"{self.name}-refresh", daemon=True).start()
+        except Exception as e:
+            self._lock.release()
+            logger.error(f"Could not start {self.name} refresh: {e}")
+            return False
+        
+        return True
+    
+    def ensure(self, refresh: Callable[[], object], is_stale: Callable[[], bool],
+               built: bool, wait: bool = False) -> bool:
+        """
+        Keep a lazily built in-memory index fresh
+        
+        Until the first build, or when ``wait`` is set, the refresh runs in
+        this thread. After that a stale index keeps being served while it is
+        refreshed in the background.
+        
+        Args:
+            refresh: Rebuilds the index
+            is_stale: True when a refresh is due
+            built: Whether the index has been built at least once
+            wait: Refresh in this thread even once built
+        
+        Returns:
+            True if a refresh ran or was started
+        """
+        if not built or wait:
+            return self.run(refresh, is_stale)
+        if is_stale():
+            return self.start(refresh, is_stale)
+        return False
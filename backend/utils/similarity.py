@@ -0,0 +1,271 @@
+"""
+Similarity index utilities for the Retailer Recommendation System
+"""
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from sklearn.cluster import KMeans
+from typing import List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k largest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+class NeighborIndex:
+    """Precomputed top-k cosine neighbour table (int32 rows + float32 scores, best first)"""
+    
+    def __init__(self, neighbors: np.ndarray, scores: np.ndarray, weights: Optional[np.ndarray] = None):
+        self.neighbors = neighbors
+        self.scores = scores
+        
+        # Scores clamped at zero for to_sparse; only needed when scores hold -inf padding
+        self.weights = weights
+        self._sparse = None
+    
+    @property
+    def k(self) -> int:
+        return self.neighbors.shape[1]
+    
+    def __len__(self) -> int:
+        return self.neighbors.shape[0]
+    
+    @classmethod
+    def build(cls, features, k: int = 50, chunk_size: int = 512, ann_min_items: Optional[int] = None,
+              ann_lists: Optional[int] = None, ann_probes: int = 8) -> 'NeighborIndex':
+        """
+        Build the neighbour table from an item feature matrix
+        
+        Similarities are computed for ``chunk_size`` rows at a time, so the
+        largest temporary is chunk_size x n_items rather than n_items x n_items.
+        Catalogs with at least ``ann_min_items`` items are built approximately
+        through an IVFIndex instead.
+        
+        Args:
+            features: Dense or sparse item x feature matrix (e.g. TF-IDF)
+            k: Number of neighbours to keep per item
+            chunk_size: Number of rows scored per block
+            ann_min_items: Catalog size from which the approximate build is used
+            ann_lists: IVF list count (None picks sqrt(n_items))
+            ann_probes: IVF lists probed per item; higher is slower with better recall
+        
+        Returns:
+            NeighborIndex over the rows of ``features``
+        """
+        if ann_min_items and features.shape[0] >= ann_min_items:
+            return cls.build_approximate(features, k, n_lists=ann_lists, n_probe=ann_probes)
+        
+        features = normalize(features).astype(np.float32)
+        n_items = features.shape[0]
+        k = max(0, min(k, n_items - 1))
+        
+        neighbors = np.empty((n_items, k), dtype=np.int32)
+        scores = np.empty((n_items, k), dtype=np.float32)
+        if k == 0:
+            return cls(neighbors, scores)
+        
+        features_t = features.T.tocsr() if sparse.issparse(features) else features.T
+        
+        for start in range(0, n_items, chunk_size):
+            stop = min(start + chunk_size, n_items)
+            block = features[start:stop] @ features_t
+            block = block.toarray() if sparse.issparse(block) else np.asarray(block)
+            
+            # Never report an item as its own neighbour
+            block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+            
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            
+            neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+            scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+        
+        logger.info(f"Built neighbour index for {n_items} items with k={k}")
+        return cls(neighbors, scores)
+    
+    @classmethod
+    def build_approximate(cls, features, k: int = 50, n_lists: Optional[int] = None,
+                          n_probe: int = 8) -> 'NeighborIndex':
+        """
+        Build the neighbour table from IVF candidates instead of all items
+        
+        Items are processed one inverted list at a time: every member of a
+        list is scored as one block against the members of the ``n_probe``
+        lists whose centroids are closest to that list's centroid.
+        """
+        features = normalize(features).astype(np.float32)
+        n_items = features.shape[0]
+        k = max(0, min(k, n_items - 1))
+        
+        neighbors = np.zeros((n_items, k), dtype=np.int32)
+        scores = np.full((n_items, k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return cls(neighbors, scores)
+        
+        index = IVFIndex.build(features, n_lists=n_lists, n_probe=n_probe)
+        centroid_scores = index.centroids @ index.centroids.T
+        
+        for list_id in range(index.n_lists):
+            members = index.list_items[index.list_offsets[list_id]:index.list_offsets[list_id + 1]]
+            if len(members) == 0:
+                continue
+            
+            candidates = np.concatenate([
+                index.list_items[index.list_offsets[probe]:index.list_offsets[probe + 1]]
+                for probe in top_k_indices(centroid_scores[list_id], index.n_probe)
+            ])
+            
+            block = features[members] @ features[candidates].T
+            block = block.toarray() if sparse.issparse(block) else np.asarray(block)
+            
+            # Never report an item as its own neighbour
+            block[candidates[None, :] == members[:, None]] = -np.inf
+            
+            row_k = min(k, len(candidates))
+            top = np.argpartition(-block, row_k - 1, axis=1)[:, :row_k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            
+            neighbors[members, :row_k] = candidates[np.take_along_axis(top, order, axis=1)]
+            scores[members, :row_k] = np.take_along_axis(top_scores, order, axis=1)
+        
+        # Rows whose probed lists held fewer than k candidates keep -inf padding,
+        # so the sparse form gets its own clamped copy, built once here
+        weights = None if np.isfinite(scores).all() else np.maximum(scores, 0)
+        logger.info(f"Built approximate neighbour index for {n_items} items with k={k}")
+        return cls(neighbors, scores, weights)
+    
+    def similar(self, row: int, limit: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (neighbour rows, scores) for one item, best first"""
+        limit = self.k if limit is None else min(limit, self.k)
+        neighbors, scores = self.neighbors[row, :limit], self.scores[row, :limit]
+        
+        # Approximate builds pad rows that found fewer than k neighbours with -inf
+        found = np.isfinite(scores)
+        if not found.all():
+            neighbors, scores = neighbors[found], scores[found]
+        return neighbors, scores
+    
+    def to_sparse(self) -> sparse.csr_matrix:
+        """Return the table as an n_items x n_items CSR matrix of non-negative scores"""
+        if self._sparse is None:
+            # Wraps the stored arrays without copying them, so a memory-mapped
+            # table stays shared between workers
+            weights = self.weights
+            if weights is None:
+                weights = self.scores if self.scores.min(initial=0) >= 0 else np.maximum(self.scores, 0)
+            
+            n_items = len(self)
+            indptr = np.arange(n_items + 1, dtype=np.int64) * self.k
+            self._sparse = sparse.csr_matrix(
+                (weights.ravel(), self.neighbors.ravel(), indptr),
+                shape=(n_items, n_items)
+            )
+        return self._sparse
+
+class IVFIndex:
+    """Inverted-file ANN index: KMeans coarse lists, exact inner products within the probed lists"""
+    
+    def __init__(self, vectors, centroids: np.ndarray, list_offsets: np.ndarray,
+                 list_items: np.ndarray, n_probe: int = 8):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_items = list_items
+        self.n_probe = n_probe
+    
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+    
+    @classmethod
+    def build(cls, vectors, n_lists: Optional[int] = None, n_probe: int = 8,
+              sample_size: int = 100000, random_state: int = 42) -> 'IVFIndex':
+        """
+        Cluster item vectors into inverted lists
+        
+        Centroids are fitted on a sample and every item is assigned to its
+        nearest centroid. Search then scores only the items in the
+        ``n_probe`` lists closest to each query.
+        
+        Args:
+            vectors: Dense or sparse item x dimension matrix, scored by inner product
+            n_lists: Number of lists (defaults to sqrt(n_items))
+            n_probe: Default number of lists scanned per query
+            sample_size: Maximum number of items used to fit the centroids
+            random_state: Seed for sampling and KMeans
+        
+        Returns:
+            IVFIndex over the rows of ``vectors``
+        """
+        n_items = vectors.shape[0]
+        n_lists = max(1, min(n_lists or int(np.sqrt(n_items)), n_items))
+        
+        rng = np.random.default_rng(random_state)
+        sample = vectors
+        if n_items > sample_size:
+            sample = vectors[np.sort(rng.choice(n_items, sample_size, replace=False))]
+        
+        kmeans = KMeans(n_clusters=n_lists, n_init=1, random_state=random_state)
+        kmeans.fit(sample)
+        
+        labels = np.concatenate([
+            kmeans.predict(vectors[start:start + 65536]) for start in range(0, n_items, 65536)
+        ]) if n_items else np.empty(0, dtype=np.int64)
+        
+        list_items = np.argsort(labels, kind='stable').astype(np.int32)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=list_offsets[1:])
+        
+        logger.info(f"Built IVF index for {n_items} items with {n_lists} lists")
+        return cls(vectors, kmeans.cluster_centers_.astype(np.float32), list_offsets, list_items, n_probe)
+    
+    def search(self, queries, k: int, n_probe: Optional[int] = None,
+               exclude: Optional[Sequence[np.ndarray]] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Approximate top-k inner-product search
+        
+        Args:
+            queries: Query vectors, one per row (dense or sparse)
+            k: Number of items to return per query
+            n_probe: Lists scanned per query (defaults to the index setting)
+            exclude: Optional item rows to skip, one array per query
+        
+        Returns:
+            One (item rows, scores) pair per query, best first
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        
+        centroid_scores = queries @ self.centroids.T
+        centroid_scores = np.asarray(centroid_scores.todense() if sparse.issparse(centroid_scores) else centroid_scores)
+        
+        results = []
+        for i in range(centroid_scores.shape[0]):
+            probes = top_k_indices(centroid_scores[i], n_probe)
+            candidates = np.concatenate([
+                self.list_items[self.list_offsets[probe]:self.list_offsets[probe + 1]] for probe in probes
+            ])
+            if exclude is not None and len(exclude[i]):
+                candidates = candidates[~np.isin(candidates, exclude[i])]
+            
+            query = queries[i]
+            if sparse.issparse(query):
+                candidate_scores = (self.vectors[candidates] @ query.T).toarray().ravel()
+            else:
+                candidate_scores = self.vectors[candidates] @ np.asarray(query).ravel()
+            
+            top = top_k_indices(candidate_scores, k)
+            results.append((candidates[top], candidate_scores[top].astype(np.float32)))
+        
+        return results
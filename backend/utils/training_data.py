@@ -0,0 +1,218 @@
+"""
+Streaming training data loaders for the Retailer Recommendation System
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+from backend.models.mongodb_models import Product, Purchase
+from backend.utils.data_processor import PurchaseMatrix
+
+logger = logging.getLogger(__name__)
+
+class PurchaseColumns:
+    """Columnar purchase history: int32 id codes plus float32/datetime64 value columns"""
+    
+    def __init__(self, retailer_codes: np.ndarray, product_codes: np.ndarray,
+                 retailer_ids: np.ndarray, product_ids: np.ndarray,
+                 quantity: np.ndarray, total_amount: np.ndarray, purchase_date: np.ndarray):
+        self.retailer_codes = retailer_codes
+        self.product_codes = product_codes
+        self.retailer_ids = retailer_ids
+        self.product_ids = product_ids
+        self.quantity = quantity
+        self.total_amount = total_amount
+        self.purchase_date = purchase_date
+    
+    def __len__(self) -> int:
+        return len(self.retailer_codes)
+    
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+    
+    def to_matrix(self, values: np.ndarray) -> PurchaseMatrix:
+        """Build a PurchaseMatrix with one value per purchase (repeats are averaged)"""
+        return PurchaseMatrix.from_codes(
+            self.retailer_codes, self.product_codes, values, self.retailer_ids, self.product_ids
+        )
+    
+    def subset(self, mask: np.ndarray) -> 'PurchaseColumns':
+        """Select purchases by boolean mask, recoding ids to those still present"""
+        retailer_codes, retailer_remap = np.unique(self.retailer_codes[mask], return_inverse=True)
+        product_codes, product_remap = np.unique(self.product_codes[mask], return_inverse=True)
+        return PurchaseColumns(
+            retailer_remap.astype(np.int32), product_remap.astype(np.int32),
+            self.retailer_ids[retailer_codes], self.product_ids[product_codes],
+            self.quantity[mask], self.total_amount[mask], self.purchase_date[mask]
+        )
+    
+    @classmethod
+    def empty_columns(cls) -> 'PurchaseColumns':
+        return cls(
+            np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32),
+            np.array([], dtype=object), np.array([], dtype=object),
+            np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32),
+            np.empty(0, dtype='datetime64[ms]')
+        )
+
+class TrainingDataLoader:
+    """Streams projected documents from raw pymongo cursors into training columns"""
+    
+    PRODUCT_FIELDS = ('name', 'category', 'subcategory', 'brand', 'price', 'description', 'popularity_score')
+    
+    def __init__(self, batch_size: int = 10000):
+        self.batch_size = batch_size
+    
+    def load_purchases(self, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None) -> PurchaseColumns:
+        """
+        Load purchases into preallocated columns without building documents
+        
+        Ids are coded as they stream in and recoded in sorted order at the
+        end, so codes line up with PurchaseMatrix.from_frame layouts.
+        
+        Args:
+            since: Only load purchases on or after this date
+            until: Only load purchases before this date
+        
+        Returns:
+            PurchaseColumns (empty if nothing matched or loading failed)
+        """
+        try:
+            date_range = {}
+            if since:
+                date_range['$gte'] = since
+            if until:
+                date_range['$lt'] = until
+            query = {'purchase_date': date_range} if date_range else {}
+            collection = Purchase._get_collection()
+            capacity = max(collection.count_documents(query), 1)
+            
+            retailer_codes = np.empty(capacity, dtype=np.int32)
+            product_codes = np.empty(capacity, dtype=np.int32)
+            quantity = np.empty(capacity, dtype=np.float32)
+            total_amount = np.empty(capacity, dtype=np.float32)
+            purchase_date = np.empty(capacity, dtype='datetime64[ms]')
+            columns = [retailer_codes, product_codes, quantity, total_amount, purchase_date]
+            
+            retailer_vocab: Dict[str, int] = {}
+            product_vocab: Dict[str, int] = {}
+            size = 0
+            
+            cursor = collection.find(
+                query,
+                projection={'_id': 0, 'retailer_id': 1, 'product_id': 1,
+                            'quantity': 1, 'total_amount': 1, 'purchase_date': 1},
+                batch_size=self.batch_size
+            )
+            
+            for batch in self._batches(cursor):
+                n = len(batch)
+                if size + n > len(retailer_codes):
+                    # More documents arrived since counting; grow geometrically
+                    columns = [self._grow(column, max(2 * len(column), size + n)) for column in columns]
+                    retailer_codes, product_codes, quantity, total_amount, purchase_date = columns
+                
+                retailer_codes[size:size + n] = [
+                    retailer_vocab.setdefault(str(doc['retailer_id']), len(retailer_vocab)) for doc in batch
+                ]
+                product_codes[size:size + n] = [
+                    product_vocab.setdefault(str(doc['product_id']), len(product_vocab)) for doc in batch
+                ]
+                quantity[size:size + n] = [doc.get('quantity') or 0 for doc in batch]
+                total_amount[size:size + n] = [float(str(doc.get('total_amount') or 0)) for doc in batch]
+                purchase_date[size:size + n] = [doc.get('purchase_date') for doc in batch]
+                size += n
+            
+            if size == 0:
+                return PurchaseColumns.empty_columns()
+            
+            retailer_ids, retailer_codes = self._sorted_codes(retailer_vocab, retailer_codes[:size])
+            product_ids, product_codes = self._sorted_codes(product_vocab, product_codes[:size])
+            
+            logger.info(f"Loaded {size} purchases ({len(retailer_ids)} retailers, {len(product_ids)} products)")
+            return PurchaseColumns(
+                retailer_codes, product_codes, retailer_ids, product_ids,
+                quantity[:size], total_amount[:size], purchase_date[:size]
+            )
+        
+        except Exception as e:
+            logger.error(f"Error streaming purchase data: {e}")
+            return PurchaseColumns.empty_columns()
+    
+    def load_products(self) -> pd.DataFrame:
+        """
+        Load active products with only the fields content features need
+        
+        Returns:
+            DataFrame with product_id, category, price, popularity_score and content columns
+        """
+        try:
+            collection = Product._get_collection()
+            projection = dict.fromkeys(self.PRODUCT_FIELDS, 1)
+            cursor = collection.find(
+                {'is_active': {'$ne': False}}, projection=projection, batch_size=self.batch_size
+            )
+            
+            product_ids: List[str] = []
+            categories: List[str] = []
+            content: List[str] = []
+            prices: List[float] = []
+            popularity: List[float] = []
+            
+            for batch in self._batches(cursor):
+                for doc in batch:
+                    product_ids.append(str(doc['_id']))
+                    categories.append(doc.get('category') or '')
+                    content.append(' '.join(
+                        doc.get(field) or '' for field in ('name', 'category', 'subcategory', 'brand', 'description')
+                    ))
+                    prices.append(float(str(doc.get('price') or 0)))
+                    popularity.append(float(str(doc.get('popularity_score') or 0)))
+            
+            if not product_ids:
+                return pd.DataFrame()
+            
+            return pd.DataFrame({
+                'product_id': product_ids,
+                'category': categories,
+                'price': np.array(prices, dtype=np.float32),
+                'popularity_score': np.array(popularity, dtype=np.float32),
+                'content': content
+            })
+        
+        except Exception as e:
+            logger.error(f"Error streaming product data: {e}")
+            return pd.DataFrame()
+    
+    def _batches(self, cursor):
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    @staticmethod
+    def _grow(column: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.empty(capacity, dtype=column.dtype)
+        grown[:len(column)] = column
+        return grown
+    
+    @staticmethod
+    def _sorted_codes(vocab: Dict[str, int], codes: np.ndarray):
+        """Recode first-seen codes so that code order matches sorted id order"""
+        ids = np.empty(len(vocab), dtype=object)
+        for value, code in vocab.items():
+            ids[code] = value
+        
+        order = np.argsort(ids.astype(str), kind='stable')
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        
+        return ids[order], rank[codes]
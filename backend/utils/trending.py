@@ -0,0 +1,209 @@
+"""
+Time-decayed trending product counters for the Retailer Recommendation System
+"""
+
+import heapq
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+from backend.models.mongodb_models import Product, Purchase
+from backend.utils.refresh import SingleFlight
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class TrendingCounter:
+    """Exponentially decayed per-product purchase counts with O(1) updates"""
+    
+    # Rescale stored weights before exp() growth costs float precision
+    MAX_WEIGHT = 1e12
+    
+    # Weights this small are dropped when rescaling
+    MIN_WEIGHT = 1e-3
+    
+    # Seconds a ranking is reused; the rating term does not decay, so the
+    # order drifts slowly with time even when no purchases arrive
+    RANKING_TTL = 60
+    
+    def __init__(self, half_life_hours: float = 72, window_days: int = 7, max_age: float = 3600):
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self.window_days = window_days
+        self.max_age = max_age
+        self.seeded_at = None
+        
+        # Forward decay: a purchase at time t adds exp(rate * (t - landmark)), so
+        # every stored weight shares one decay factor and updates never touch others
+        self._landmark = time.time()
+        self._weights: Dict[str, float] = {}
+        self._ratings: Dict[str, float] = {}
+        self._unrated = set()
+        
+        # Product ids by trend score, kept current as purchases are recorded
+        self._ranking: List[str] = []
+        self._ranking_size = 0
+        self._ranked_at = None
+        self._lock = threading.Lock()
+        self._reseeds = SingleFlight('trending')
+    
+    def seed(self) -> 'TrendingCounter':
+        """Replace the counters with decayed counts from one aggregation over the window"""
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        rate_per_ms = self.decay_rate / 1000
+        
+        rows = Purchase.objects(purchase_date__gte=now - timedelta(days=self.window_days)).aggregate([
+            {'$group': {
+                '_id': '$product_id',
+                'weight': {'$sum': {'$exp': {'$multiply': [-rate_per_ms, {'$subtract': [now, '$purchase_date']}]}}}
+            }}
+        ])
+        weights = {str(row['_id']): float(row['weight']) for row in rows}
+        ratings = self._load_ratings(weights)
+        
+        with self._lock:
+            self._landmark = self._timestamp(now)
+            self._weights = weights
+            self._ratings = ratings
+            self._unrated = set()
+            self._ranked_at = None
+            self.seeded_at = time.monotonic()
+        
+        logger.info(f"Seeded trending counters for {len(weights)} products in {time.perf_counter() - started:.2f}s")
+        return self
+    
+    def is_stale(self) -> bool:
+        return self.seeded_at is None or time.monotonic() - self.seeded_at > self.max_age
+    
+    def ensure_fresh(self, wait: bool = False) -> 'TrendingCounter':
+        """
+        Reseed if never seeded or older than ``max_age`` seconds (picks up other workers' purchases)
+        
+        See ``SingleFlight.ensure`` for when callers wait for the reseed.
+        """
+        self._reseeds.ensure(self.seed, self.is_stale, self.seeded_at is not None, wait)
+        return self
+    
+    def record(self, product_id: str, when: Optional[datetime] = None, rating: Optional[float] = None):
+        """Count one purchase of a product; O(1) plus O(ranking) if it enters the ranking"""
+        timestamp = self._timestamp(when or datetime.utcnow())
+        
+        with self._lock:
+            weight = math.exp(self.decay_rate * (timestamp - self._landmark))
+            self._weights[product_id] = self._weights.get(product_id, 0.0) + weight
+            
+            lowered = False
+            if rating is not None:
+                lowered = float(rating) < self._ratings.get(product_id, 0.0)
+                self._ratings[product_id] = float(rating)
+                self._unrated.discard(product_id)
+            elif product_id not in self._ratings:
+                self._unrated.add(product_id)
+            
+            if self._weights[product_id] > self.MAX_WEIGHT:
+                self._rescale(timestamp)
+            elif lowered:
+                # A lower score can fall below products outside the ranking
+                self._ranked_at = None
+            else:
+                self._merge_into_ranking(product_id)
+    
+    def top(self, k: int) -> List[Tuple[str, float, float]]:
+        """
+        Highest trend scores
+        
+        The trend score is 0.7 x decayed purchase count + 0.3 x product rating.
+        The ranking is selected with a heap at most once per ``RANKING_TTL``
+        (or when a larger ``k`` is asked for); recorded purchases are merged
+        into it, so reads are O(k).
+        
+        Args:
+            k: Number of products to return
+        
+        Returns:
+            (product_id, trend_score, decayed_count) tuples, highest first
+        """
+        with self._lock:
+            unrated = list(self._unrated)
+        if unrated:
+            ratings = self._load_ratings(unrated)
+            with self._lock:
+                self._ratings.update(ratings)
+                self._unrated.difference_update(ratings)
+                
+                # Unrated products were ranked with a zero rating, so loading one only raises its score
+                for product_id in ratings:
+                    self._merge_into_ranking(product_id)
+        
+        with self._lock:
+            factor = self._decay_factor()
+            if (self._ranked_at is None or k > self._ranking_size
+                    or time.monotonic() - self._ranked_at > self.RANKING_TTL):
+                self._ranking_size = max(k, self._ranking_size)
+                self._ranking = heapq.nlargest(
+                    self._ranking_size, self._weights, key=lambda product_id: self._score(product_id, factor)
+                )
+                self._ranked_at = time.monotonic()
+            
+            return [
+                (product_id, self._score(product_id, factor), self._weights[product_id] * factor)
+                for product_id in self._ranking[:k]
+            ]
+    
+    def _merge_into_ranking(self, product_id: str):
+        """Re-place a product whose score went up; the caller holds the lock"""
+        if self._ranked_at is None or product_id not in self._weights:
+            return
+        
+        factor = self._decay_factor()
+        ranking = self._ranking
+        if product_id in ranking:
+            ranking.remove(product_id)
+        elif len(ranking) >= self._ranking_size and self._score(ranking[-1], factor) >= self._score(product_id, factor):
+            return
+        
+        ranking.append(product_id)
+        ranking.sort(key=lambda ranked_id: self._score(ranked_id, factor), reverse=True)
+        del ranking[self._ranking_size:]
+    
+    def _score(self, product_id: str, factor: float) -> float:
+        return self._weights[product_id] * factor * 0.7 + self._ratings.get(product_id, 0.0) * 0.3
+    
+    def _decay_factor(self) -> float:
+        return math.exp(-self.decay_rate * (time.time() - self._landmark))
+    
+    def _rescale(self, timestamp: float):
+        """Move the landmark to ``timestamp`` and drop fully decayed products"""
+        factor = math.exp(-self.decay_rate * (timestamp - self._landmark))
+        self._weights = {
+            product_id: weight * factor
+            for product_id, weight in self._weights.items()
+            if weight * factor >= self.MIN_WEIGHT
+        }
+        self._ratings = {product_id: rating for product_id, rating in self._ratings.items() if product_id in self._weights}
+        self._unrated.intersection_update(self._weights)
+        self._landmark = timestamp
+        
+        # Dropped products may still be ranked
+        self._ranked_at = None
+    
+    @staticmethod
+    def _load_ratings(product_ids) -> Dict[str, float]:
+        ratings = dict.fromkeys(product_ids, 0.0)
+        for doc in Product.objects(pk__in=list(ratings)).only('rating').as_pymongo():
+            ratings[str(doc['_id'])] = float(str(doc.get('rating') or 0))
+        return ratings
+    
+    @staticmethod
+    def _timestamp(when: datetime) -> float:
+        # Purchase dates are naive UTC
+        return (when - datetime(1970, 1, 1)).total_seconds()
+
+# Global instance
+trending_products = TrendingCounter(
+    half_life_hours=Config.TRENDING_HALF_LIFE_HOURS,
+    window_days=Config.TRENDING_WINDOW_DAYS,
+    max_age=Config.TRENDING_RESEED_INTERVAL
+)
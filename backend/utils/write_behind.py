@@ -0,0 +1,188 @@
+"""
+Write-behind persistence queue for the Retailer Recommendation System
+"""
+
+import atexit
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Bounded queue of MongoDB write operations flushed in bulk by a background thread"""
+    
+    def __init__(self, max_pending: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, enqueue_timeout: float = 0.05):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._exit_hook_registered = False
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'enqueued': 0,
+            'written': 0,
+            'failed': 0,
+            'dropped': 0,
+            'backpressure_waits': 0,
+            'batches': 0,
+            'last_flush_seconds': 0.0
+        }
+    
+    def submit(self, document_cls, operation) -> bool:
+        """
+        Queue one write for a collection
+        
+        Blocks for at most ``enqueue_timeout`` seconds when the queue is full
+        and drops the write if no space frees up in that time.
+        
+        Args:
+            document_cls: MongoEngine document class owning the collection
+            operation: pymongo write model (InsertOne, UpdateOne, ...)
+        
+        Returns:
+            True if the write was queued, False if it was dropped
+        """
+        return self.submit_many(document_cls, [operation]) == 1
+    
+    def submit_many(self, document_cls, operations: List) -> int:
+        """Queue several writes for a collection; returns the number queued"""
+        self._ensure_started()
+        
+        queued = 0
+        for operation in operations:
+            item = (document_cls, operation)
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._increment('backpressure_waits')
+                try:
+                    self._queue.put(item, timeout=self.enqueue_timeout)
+                except queue.Full:
+                    self._increment('dropped')
+                    continue
+            queued += 1
+        
+        self._increment('enqueued', queued)
+        if queued < len(operations):
+            logger.warning(f"Write-behind queue full, dropped {len(operations) - queued} writes")
+        
+        return queued
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued write has been attempted; returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if self._thread is None or not self._thread.is_alive():
+                self._drain()
+                break
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def close(self, timeout: float = 10.0):
+        """Stop the flusher after writing everything still queued"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        
+        # Anything queued after the flusher exited is written inline
+        self._drain()
+    
+    def metrics(self) -> Dict:
+        """Return counters plus the current queue depth"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics['pending'] = self._queue.qsize()
+        metrics['max_pending'] = self.max_pending
+        return metrics
+    
+    def _ensure_started(self):
+        # Started lazily so a forking server never inherits a running flusher
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+                
+                if not self._exit_hook_registered:
+                    atexit.register(self.close)
+                    self._exit_hook_registered = True
+    
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._write(batch)
+        
+        self._drain()
+    
+    def _collect_batch(self) -> List:
+        """Gather up to ``batch_size`` writes, waiting at most ``flush_interval``"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _drain(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+    
+    def _write(self, batch: List):
+        """Write a batch with one unordered bulk_write per collection"""
+        started = time.perf_counter()
+        
+        operations_by_collection = defaultdict(list)
+        for document_cls, operation in batch:
+            operations_by_collection[document_cls].append(operation)
+        
+        for document_cls, operations in operations_by_collection.items():
+            try:
+                document_cls._get_collection().bulk_write(operations, ordered=False)
+                self._increment('written', len(operations))
+            except Exception as e:
+                # Unordered writes may partially succeed; count what was applied
+                details = getattr(e, 'details', None) or {}
+                applied = details.get('nInserted', 0) + details.get('nMatched', 0) + details.get('nUpserted', 0)
+                self._increment('written', applied)
+                self._increment('failed', len(operations) - applied)
+                logger.error(f"Error writing {len(operations)} queued {document_cls.__name__} operations: {e}")
+        
+        with self._metrics_lock:
+            self._metrics['batches'] += 1
+            self._metrics['last_flush_seconds'] = time.perf_counter() - started
+        
+        for _ in batch:
+            self._queue.task_done()
+    
+    def _increment(self, name: str, amount: int = 1):
+        with self._metrics_lock:
+            self._metrics[name] += amount
@@ -14,9 +14,61 @@ class Config:
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     
     # ML Model Configuration
-    MODEL_UPDATE_INTERVAL = 24  # hours
+    MODEL_UPDATE_INTERVAL = 24  # hours; longest a snapshot is kept once anything has changed
+    # Retrain thresholds count changes across all workers (recounted from MongoDB every MODEL_RELOAD_INTERVAL)
+    RETRAIN_PURCHASE_THRESHOLD = 1000  # new purchases since the last snapshot before retraining
+    RETRAIN_FEEDBACK_THRESHOLD = 5000  # new feedback events since the last snapshot before retraining
+    RETRAIN_CATALOG_THRESHOLD = 100  # product changes since the last snapshot before retraining
     MIN_INTERACTIONS_FOR_RECOMMENDATION = 5
     RECOMMENDATION_COUNT = 10
+    SIMILARITY_TOP_K = 50  # neighbours kept per product
+    PRODUCT_CLUSTERS = 10  # k-means clusters over product TF-IDF vectors
+    CLUSTER_BATCH_SIZE = 1024  # products per mini-batch k-means step
+    SIMILARITY_CHUNK_SIZE = 512  # rows scored per block when building the index
+    ANN_MIN_ITEMS = 50000  # catalog size from which item retrieval uses the IVF index
+    ANN_LISTS = 0  # IVF lists; 0 picks sqrt(number of items)
+    ANN_PROBES = 8  # IVF lists scanned per query; raise for recall, lower for latency
+    FOLD_IN_DRIFT_THRESHOLD = 0.2  # folded purchases / trained interactions before a full refit
+    MODEL_ARTIFACT_DIR = os.environ.get('MODEL_ARTIFACT_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'model_artifacts'
+    )
+    MODEL_ARTIFACT_VERSIONS = 3  # versions kept on disk per model
+    MODEL_RELOAD_INTERVAL = 30  # seconds between worker checks for newer model artifacts
+    RECOMMENDATION_DEADLINE = 0.5  # seconds for the whole recommendation pipeline
+    CANDIDATE_STAGE_TIMEOUT = 0.25  # seconds candidate sources may take before being dropped
+    CANDIDATES_PER_SOURCE = 200  # candidates each source passes to the ranker
+    PIPELINE_WORKERS = 16  # threads running candidate sources and ranking inputs
+    LEADERBOARD_SIZE = 200  # products kept per popularity leaderboard (global and per category)
+    LEADERBOARD_WINDOW_DAYS = 30  # purchases counted towards popularity
+    LEADERBOARD_REFRESH_INTERVAL = 300  # seconds between popularity leaderboard refreshes
+    PERSONALIZED_WORKERS = 16  # threads running personalized recommendation sources
+    PERSONALIZED_SOURCE_TIMEOUT = 0.5  # seconds before a slow personalized source is dropped
+    BATCH_SCORING_CHUNK_SIZE = 256  # retailers scored per matrix product
+    BATCH_MAX_RETAILERS = 1000  # retailers accepted per batch request
+    SERVICE_API_TOKEN = os.environ.get('SERVICE_API_TOKEN')  # X-Service-Token value allowing batch requests for any retailer
+    RECOMMENDATION_CACHE_SIZE = 10000  # cached (retailer, count) results
+    RECOMMENDATION_CACHE_TTL = 900  # seconds; per worker, so other workers see an invalidation up to MODEL_RELOAD_INTERVAL later
+    COLLABORATIVE_ALGORITHM = os.environ.get('COLLABORATIVE_ALGORITHM', 'svd')  # 'svd' or 'als'
+    COLLABORATIVE_PARTITION_BY = os.environ.get('COLLABORATIVE_PARTITION_BY', '')  # '', 'category' or 'store_type'
+    PARTITION_TRAINING_PROCESSES = 0  # 0 uses every CPU
+    ALS_FACTORS = 50  # latent factors for implicit ALS
+    ALS_REGULARIZATION = 0.1
+    ALS_ALPHA = 10.0  # confidence = 1 + alpha * implicit rating
+    ALS_ITERATIONS = 15
+    ALS_CG_STEPS = 3  # conjugate-gradient steps per least-squares solve
+    ALS_THREADS = 0  # 0 uses every CPU
+    TRAINING_LOAD_BATCH_SIZE = 10000  # documents per cursor batch when loading training data
+    PURCHASE_INDEX_MAX_AGE = 300  # seconds before the co-purchase index is rebuilt; bounds how long other workers' purchases go unseen
+    RETAILER_NEIGHBOR_SEARCH = os.environ.get('RETAILER_NEIGHBOR_SEARCH', 'lsh')  # 'lsh' (MinHash) or 'exact'
+    MINHASH_PERMUTATIONS = 128  # MinHash values per retailer signature
+    MINHASH_BANDS = 64  # LSH bands; fewer rows per band finds lower-similarity neighbours
+    TRENDING_HALF_LIFE_HOURS = 72  # half-life of a purchase in the trending counters
+    TRENDING_WINDOW_DAYS = 7  # purchases aggregated when seeding the trending counters
+    TRENDING_RESEED_INTERVAL = 3600  # seconds before trending counters are reseeded from MongoDB
+    WRITE_BEHIND_MAX_PENDING = 10000  # queued writes before callers see backpressure
+    WRITE_BEHIND_BATCH_SIZE = 500  # writes per bulk_write
+    WRITE_BEHIND_FLUSH_INTERVAL = 1.0  # seconds a partial batch may wait
+    WRITE_BEHIND_ENQUEUE_TIMEOUT = 0.05  # seconds to wait for space before dropping a write
     
     # API Configuration
     API_RATE_LIMIT = "100 per hour"
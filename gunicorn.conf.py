@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration for the Retailer Recommendation System
+
+With preload enabled the app and its models are loaded once in the master
+and shared copy-on-write with the workers; workers then poll the model
+store for snapshots trained later instead of being re-forked.
+"""
+
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+def when_ready(server):
+    """Train or load models in the master before the first fork"""
+    if server.cfg.preload_app:
+        from backend.app import preload_models
+        preload_models(server.app.wsgi())
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's reach, so
+    # collections in workers do not write to (and un-share) those pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        # MongoDB clients are not fork-safe; each worker opens its own
+        from backend.app import connect_databases
+        connect_databases(server.app.wsgi())
+
+def post_worker_init(worker):
+    from backend.app import start_model_reloader
+    start_model_reloader(worker.wsgi)
+
+def worker_exit(server, worker):
+    # Persist queued recommendation and feedback writes before exiting
+    from backend.models.recommendation import recommendation_engine
+    recommendation_engine.write_queue.close()
@@ -21,6 +21,8 @@ def main():
     parser.add_argument('--config', default='development', help='Flask configuration')
     parser.add_argument('--clean-data', action='store_true', help='Clean data before training')
     parser.add_argument('--verbose', action='store_true', help='Verbose output')
+    parser.add_argument('--compare-collaborative', action='store_true',
+                        help='Report SVD vs implicit ALS training time and memory on the same data')
     
     args = parser.parse_args()
     
@@ -45,8 +47,23 @@ def main():
                 print(f"  - Feedback cleaned: {clean_results['feedback_cleaned']}")
                 print()
         
+        # Compare collaborative algorithms if requested
+        if args.compare_collaborative:
+            print("Comparing collaborative models...")
+            report = recommendation_engine.compare_collaborative_models()
+            if not report:
+                print("No purchase data available for comparison")
+            else:
+                interactions = report.pop('interactions')
+                print(f"  Data: {interactions['retailers']} retailers x {interactions['products']} products, "
+                      f"{interactions['nnz']} interactions")
+                for algorithm, stats in report.items():
+                    print(f"  - {algorithm}: {stats['training_seconds']}s, "
+                          f"peak {stats['peak_memory_mb']} MB, factors {stats['factor_memory_mb']} MB")
+            print()
+        
         # Train models
-        print("Training recommendation models...")
+        print(f"Training recommendation models ({recommendation_engine.collaborative_algorithm})...")
         try:
             recommendation_engine.train_models()
             print("✓ Model training completed successfully!")
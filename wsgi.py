@@ -0,0 +1,8 @@
+"""
+WSGI entry point for production servers (gunicorn wsgi:app)
+"""
+
+import os
+from backend.app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))